@@ -64,22 +64,19 @@ SPDX-License-Identifier: GPL-3.0-only
 __revision__ = "$Revision: 112858 $"
 
 import argparse
+import atexit
 import ctypes
-import datetime
-import fnmatch
-import glob
+import functools
 import importlib;
 import io
 import os
 import platform
 import re
 import shlex
-import shutil
 import signal
-import subprocess
 import sysconfig # Since Python 3.2.
 import sys
-import tempfile
+import threading
 
 # Check for minimum Python version first.
 g_uMinPythonVerTuple = (3, 4);
@@ -92,18 +89,56 @@ g_sScriptPath = os.path.abspath(os.path.dirname(__file__));
 g_sScriptName = os.path.basename(__file__);
 g_sOutPath    = os.path.join(g_sScriptPath, 'out');
 
+# Per-thread output state. If a thread has an output buffer (aBuffer) set, all its output, as well as
+# all changes to global state (error / warning messages, configuration) go there instead, so that the
+# results of concurrently running checks don't get mixed up, see deferCall().
+g_oOutputTls = threading.local();
+
+def deferCall(fnCall, *aArgs):
+    """
+    Appends the given call to the current thread's output buffer, if any, for performing it later
+    via flushOutput() on the main thread.
+
+    Returns True if the call was deferred, False if the caller needs to perform it right away.
+    """
+    aBuffer = getattr(g_oOutputTls, 'aBuffer', None);
+    if aBuffer is None:
+        return False;
+    aBuffer.append((fnCall, aArgs));
+    return True;
+
+def writeOutput(afnWrite, sData):
+    """
+    Writes data using the given write functions, or appends it to the current thread's output buffer (if any).
+    """
+    if deferCall(writeOutput, afnWrite, sData):
+        return;
+    for fnWrite in afnWrite:
+        fnWrite(sData);
+
+def flushOutput(aBuffer):
+    """
+    Performs the calls of an output buffer collected by deferCall(), in order.
+    """
+    for fnCall, aArgs in aBuffer:
+        fnCall(*aArgs);
+
 class Log(io.TextIOBase):
     """
     Duplicates output to multiple file-like objects (used for logging and stdout).
     """
     def __init__(self, *files):
         self.asFiles = files;
+        # Bound write methods of all files, so that we don't need to look them up on every write.
+        self.afnWrite = tuple(f.write for f in files);
     def write(self, data):
         """
         Write data to all files.
+
+        Returns the number of characters written.
         """
-        for f in self.asFiles:
-            f.write(data);
+        writeOutput(self.afnWrite, data);
+        return len(data);
     def flush(self):
         """
         Flushes all files.
@@ -112,6 +147,28 @@ class Log(io.TextIOBase):
             if not f.closed:
                 f.flush();
 
+class MessageCounter:
+    """
+    Counts and collects messages (errors, warnings, ...).
+    Thread-safe, as checks might run concurrently.
+    """
+    def __init__(self):
+        self.oLock = threading.Lock();
+        # Number of messages.
+        self.cMessages = 0;
+        # List of messages.
+        self.asMessages = [];
+    def add(self, sMessage):
+        """
+        Adds a message.
+        Deferred when running as part of concurrently performed checks, to keep the message order stable.
+        """
+        if deferCall(self.add, sMessage):
+            return;
+        with self.oLock:
+            self.cMessages += 1;
+            self.asMessages.append(sMessage);
+
 class BuildArch:
     """
     Supported build architectures enumeration.
@@ -161,16 +218,31 @@ class BuildTarget:
 # Supported build targets.
 g_aeBuildTargets = [ BuildTarget.LINUX, BuildTarget.WINDOWS, BuildTarget.SOLARIS, BuildTarget.BSD, BuildTarget.HAIKU ];
 
+# Standard include search paths per build target, sorted by most likely-ness.
+# '{}' gets replaced by the library name.
+g_dictIncSearchPaths = {
+    BuildTarget.LINUX: [ "/usr/include", "/usr/local/include",
+                         "/usr/include/{}", "/usr/local/include/{}",
+                         "/opt/include", "/opt/local/include" ]
+};
+# Standard library search paths per build target, sorted by most likely-ness.
+g_dictLibSearchPaths = {
+    BuildTarget.LINUX:  [ "/lib", "/lib64",
+                          "/usr/lib", "/usr/local/lib",
+                          "/usr/lib64", "/lib", "/lib64",
+                          "/opt/lib", "/opt/local/lib" ],
+    BuildTarget.DARWIN: [ "/opt/homebrew/lib" ]
+};
+
 g_fDebug = False;             # Enables debug mode. For development.
 g_fContOnErr = False;         # Continue on fatal errors.
 g_fCompatMode = False;        # Enables compatibility mode to mimic the old build scripts.
 g_sEnvVarPrefix = 'VBOX_';
 g_sFileLog = 'configure.log'; # Log file path.
 g_cVerbosity = 4;             # Verbosity level (0=none, 1=min, 5=max). Defaults to 4 for now (development phase).
-g_cErrors = 0;                # Number of error messages.
-g_asErrors = [];              # List of error messages.
-g_cWarnings = 0;              # Number of warning messages.
-g_asWarnings = [];            # List of warning messages.
+g_cSecsVersionTimeout = 5;    # Timeout (in seconds) for querying a tool's version.
+g_oErrors = MessageCounter();   # Error messages.
+g_oWarnings = MessageCounter(); # Warning messages.
 
 # Defines the host target.
 g_sHostTarget = platform.system().lower();
@@ -283,8 +355,7 @@ def printWarn(sMessage, fLogOnly = False, fDontCount = False):
     _ = fLogOnly;
     print(f"!!! WARN: {sMessage}", file=sys.stdout);
     if not fDontCount:
-        globals()['g_cWarnings'] += 1;
-        globals()['g_asWarnings'].extend([ sMessage ]);
+        g_oWarnings.add(sMessage);
 
 def printError(sMessage, fLogOnly = False, fDontCount = False):
     """
@@ -293,8 +364,7 @@ def printError(sMessage, fLogOnly = False, fDontCount = False):
     _ = fLogOnly;
     print(f"*** ERROR: {sMessage}", file=sys.stdout);
     if not fDontCount:
-        globals()['g_cErrors'] += 1;
-        globals()['g_asErrors'].extend([ sMessage ]);
+        g_oErrors.add(sMessage);
 
 def printVerbose(uVerbosity, sMessage, fLogOnly = False):
     """
@@ -309,13 +379,52 @@ def printLog(sMessage, sPrefix = '---'):
     Prints a log message to the log.
     """
     if g_fhLog:
-        g_fhLog.write(f'{sPrefix} {sMessage}\n');
+        writeOutput((g_fhLog.write, ), f'{sPrefix} {sMessage}\n');
+
+@functools.lru_cache(maxsize = None)
+def getRunTimestamp():
+    """
+    Returns the (formatted) time stamp of this configure run.
+    Determined once, so that the log and all generated files carry the same time stamp.
+    """
+    import datetime;
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S");
+
+@functools.lru_cache(maxsize = None)
+def getGeneratedFileBanner(sComment):
+    """
+    Returns the "automatically generated" banner for generated files, using the given comment prefix.
+    """
+    return '\n'.join([ f'{sComment} Automatically generated by',
+                       sComment,
+                       f'{sComment}   {g_sScriptName} ' + ' '.join(sys.argv[1:]),
+                       sComment,
+                       f'{sComment} DO NOT EDIT THIS FILE MANUALLY',
+                       f'{sComment} It will be completely overwritten if {g_sScriptName} is executed again.',
+                       sComment,
+                       f'{sComment} Generated on {getRunTimestamp()}',
+                       sComment ]);
+
+def closeLog():
+    """
+    Restores stdout / stderr and flushes and closes the log file, if any.
+    """
+    global g_fhLog;
+    if isinstance(sys.stdout, Log):
+        sys.stdout.flush();
+        sys.stdout = sys.stdout.asFiles[0];
+    if isinstance(sys.stderr, Log):
+        sys.stderr.flush();
+        sys.stderr = sys.stderr.asFiles[0];
+    if g_fhLog:
+        g_fhLog.close();
+        g_fhLog = None;
 
 def printLogHeader():
     """
     Prints the log header.
     """
-    printLog(f'Log created: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}');
+    printLog(f'Log created: {getRunTimestamp()}');
     printLog(f'Revision: {__revision__}');
     printLog(f'Generated by: {g_sScriptName} '  + ' '.join(sys.argv[1:]));
     printLog(f'Working directory: {os.getcwd()}');
@@ -323,35 +432,112 @@ def printLogHeader():
     printLog(f'Platform: {platform.platform()} ({platform.machine()})');
     printLog('');
 
-def pathExists(sPath, fNoLog = False):
+@functools.lru_cache(maxsize = None)
+def cachedPathExists(sPath):
+    """
+    Cached variant of os.path.exists().
+
+    Only use this for paths which are not expected to change while the script is running
+    (e.g. system include / library directories probed by every library check).
+    """
+    return os.path.exists(sPath);
+
+@functools.lru_cache(maxsize = None)
+def cachedIsDir(sPath):
+    """
+    Cached variant of os.path.isdir(). Same restrictions as for cachedPathExists() apply.
+    """
+    return os.path.isdir(sPath);
+
+@functools.lru_cache(maxsize = None)
+def cachedIsFile(sPath):
+    """
+    Cached variant of os.path.isfile(). Same restrictions as for cachedPathExists() apply.
+    """
+    return os.path.isfile(sPath);
+
+@functools.lru_cache(maxsize = None)
+def listDir(sPath):
+    """
+    Cached directory listing. Same restrictions as for cachedPathExists() apply.
+
+    Returns a tuple of the directory entry names; empty if the directory does not exist or is not accessible.
+    """
+    try:
+        with os.scandir(sPath) as itEntries:
+            return tuple(oEntry.name for oEntry in itEntries);
+    except OSError:
+        return ();
+
+@functools.lru_cache(maxsize = None)
+def getWinRootDrives():
+    """
+    Returns a tuple of the existing Windows root drives (e.g. 'C:'), determined once.
+    """
+    return tuple(d + ':' for d in 'CDEFGHIJKLMNOPQRSTUVWXYZ' if os.path.exists(d + ':'));
+
+@functools.lru_cache(maxsize = None)
+def getWinFallbackSearchPaths(sSubDir):
+    """
+    Returns a tuple of (desperate) fallback search paths on Windows for the given sub directory
+    (e.g. 'include' or 'lib') on all root drives, determined once.
+    """
+    asPaths = [];
+    for sDrive in getWinRootDrives():
+        asPaths.extend([ os.path.join(sDrive, p) for p in [ f'\\msys64\\mingw64\\{sSubDir}', f'\\msys64\\mingw32\\{sSubDir}', f'\\{sSubDir}' ] ]);
+        asPaths.extend([ r'c:\\Program Files', r'c:\\Program Files (x86)' ]);
+    return tuple(asPaths);
+
+@functools.lru_cache(maxsize = None)
+def getDirIndex(sBaseDir):
+    """
+    Walks a directory tree (following symlinks) and indexes all files in it.
+    Cached, as the same (system) directories get searched by lots of checks; use getDirIndex.__wrapped__() to bypass the cache.
+    Same restrictions as for cachedPathExists() apply.
+
+    Returns a dictionary of the files' paths relative to the base directory (key) and their absolute paths (value),
+    in walking order. Must not be modified by the caller.
+    """
+    dictIndex = {};
+    for sDirRoot, _, asFiles in os.walk(sBaseDir, followlinks = True):
+        for sCurFile in asFiles:
+            sFilePathRel = os.path.relpath(os.path.join(sDirRoot, sCurFile), sBaseDir)
+            dictIndex[sFilePathRel] = os.path.join(sBaseDir, sFilePathRel);
+    return dictIndex;
+
+# Results of header searches, shared by all library checks.
+# Key = (search path, header file), value = include path the header was found in, or None if not found.
+g_dictHdrFound = {};
+
+def pathExists(sPath, fNoLog = False, fCached = False):
     """
     Checks if a path exists.
 
     Returns success as boolean.
     """
-    fRc = sPath and os.path.exists(sPath);
+    fRc = sPath and (cachedPathExists(sPath) if fCached else os.path.exists(sPath));
     if not fNoLog:
         printLog('Checking if path exists: ' + (sPath if sPath else '<None>') + (' [YES]' if fRc else ' [NO]'));
     return fRc;
 
-def isDir(sDir, fNoLog = False):
+def isDir(sDir, fNoLog = False, fCached = False):
     """
     Checks if a path is a directory.
 
     Returns success as boolean.
     """
-    fRc = sDir and os.path.isdir(sDir);
+    fRc = sDir and (cachedIsDir(sDir) if fCached else os.path.isdir(sDir));
     if not fNoLog:
         printLog('Checking if directory exists: ' + (sDir if sDir else '<None>') + (' [YES]' if fRc else ' [NO]'));
     return fRc;
 
-def isFile(sFile, fNoLog = False):
+def isFile(sFile, fNoLog = False, fCached = False):
     """
     Checks if a path is a file.
 
     Returns success as boolean.
     """
-    fRc = sFile and os.path.isfile(sFile);
+    fRc = sFile and (cachedIsFile(sFile) if fCached else os.path.isfile(sFile));
     if not fNoLog:
         printLog('Checking if file exists: ' + (sFile if sFile else '<None>') + (' [YES]' if fRc else ' [NO]'));
     return fRc;
@@ -433,12 +619,83 @@ def stripLibSuff(sLib):
     sLib = re.sub(r'\.(dylib|dll|lib|a)$', '', sLib, flags = re.IGNORECASE);
     return sLib;
 
+@functools.lru_cache(maxsize = None)
+def getPathDirIndex():
+    """
+    Returns a dictionary mapping the names of all entries in the process' PATH directories
+    to the list of PATH directories containing them (in PATH order). Determined once.
+    """
+    dictIndex = {};
+    for sDir in dict.fromkeys(os.environ.get('PATH', os.defpath).split(os.pathsep)): # Removes duplicates, keeps the order.
+        sDir = sDir or os.curdir;
+        for sEntry in listDir(sDir):
+            dictIndex.setdefault(sEntry, []).append(sDir);
+    return dictIndex;
+
+@functools.lru_cache(maxsize = None)
+def cachedWhich(sCmdName):
+    """
+    Cached variant of shutil.which().
+
+    Our PATH changes only go to the environment manager, never to the process' environment,
+    so the result for a given command stays the same while the script is running.
+    PATH is only scanned once for all commands; only the candidates found are checked for being executable.
+    """
+    if g_enmHostTarget == BuildTarget.WINDOWS \
+    or os.sep in sCmdName \
+    or (os.altsep and os.altsep in sCmdName):
+        import shutil; # Handles PATHEXT and friends, and paths.
+        return shutil.which(sCmdName);
+    for sDir in getPathDirIndex().get(sCmdName, ()):
+        sPath = os.path.join(sDir, sCmdName);
+        if  os.path.isfile(sPath) \
+        and os.access(sPath, os.X_OK):
+            return sPath;
+    return None;
+
+@functools.lru_cache(maxsize = None)
+def getCmdVersion(sCmdPath, tupleVersionSwitches, fMultiline):
+    """
+    Tries to get the version of a command by trying the given version switches in order,
+    until the first one succeeds. Cached, as several checks probe the very same commands.
+
+    Returns a tuple (True, version) if a version switch succeeded, or (False, None) if not.
+    The version is a string, a list of lines if fMultiline is set, or an empty list if nothing was returned.
+    Raises subprocess.SubprocessError on failure.
+    """
+    import subprocess;
+    for sSwitch in tupleVersionSwitches:
+        # Some programs (java, for instance) output their version info in stderr, so capture both.
+        oProc = subprocess.run([sCmdPath, sSwitch], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=False,
+                               timeout=g_cSecsVersionTimeout);
+        if oProc.returncode == 0:
+            sVer = oProc.stdout.decode('utf-8', 'replace').strip().splitlines();
+            if sVer:
+                sVer = sVer[0] if (not fMultiline or isinstance(sVer, str)) else sVer;
+            return True, sVer;
+    return False, None;
+
+def getCompilerVersion(sCompilerPath):
+    """
+    Returns the version string of the given compiler (as reported by '--version'),
+    or None if it can't be determined. Cached via getCmdVersion().
+    """
+    import subprocess;
+    if not sCompilerPath:
+        return None;
+    try:
+        _, sVer = getCmdVersion(sCompilerPath, ( '--version', ), False);
+    except (OSError, subprocess.SubprocessError):
+        return None;
+    return sVer if sVer else None;
+
 def checkWhich(sCmdName, sToolDesc = None, sCustomPath = None, asVersionSwitches = None, fMultiline = False):
     """
     Helper to check for a command in PATH or custom path.
 
     Returns a tuple of (command path, version string) or (None, None) if not found.
     """
+    import subprocess;
 
     if not sCmdName:
         return None, None;
@@ -452,34 +709,28 @@ def checkWhich(sCmdName, sToolDesc = None, sCustomPath = None, asVersionSwitches
     sCmdPath = None;
     if sCustomPath:
         sCmdPath = os.path.join(sCustomPath, sCmdName);
-        if isFile(sCmdPath) and os.access(sCmdPath, os.X_OK):
+        if isFile(sCmdPath, fCached = True) and os.access(sCmdPath, os.X_OK):
             printVerbose(1, f"Found '{sCmdName}' at custom path: {sCmdPath}");
         else:
             printVerbose(1, f"'{sCmdName}' not found at custom path: {sCmdPath}");
             return None, None;
     else:
-        sCmdPath = shutil.which(sCmdName);
+        sCmdPath = cachedWhich(sCmdName);
         if sCmdPath:
             printVerbose(1, f"Found '{sCmdName}' at: {sCmdPath}");
 
     # Try to get version.
     if sCmdPath:
         if not asVersionSwitches:
-            asVersionSwitches = [ '--version', '-V', '/?', '/h', '/help', '-version', 'version' ];
+            asVersionSwitches = [ '--version', '-V' ];
         try:
-            for sSwitch in asVersionSwitches:
-                oProc = subprocess.run([sCmdPath, sSwitch], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False, timeout=10);
-                if oProc.returncode == 0:
-                    try:
-                        sVer = oProc.stdout.decode('utf-8', 'replace').strip().splitlines();
-                    except: # Some programs (java, for instance) output their version info in stderr.
-                        sVer = oProc.stderr.decode('utf-8', 'replace').strip().splitlines();
-                    if sVer:
-                        sVer = sVer[0] if (not fMultiline or isinstance(sVer, str)) else sVer;
-                        printVerbose(1, f"Detected version for '{sCmdName}' is: {sVer}");
-                    else:
-                        printVerbose(1, f"No version for '{sCmdName}' returned");
-                    return sCmdPath, sVer;
+            fFound, sVer = getCmdVersion(sCmdPath, tuple(asVersionSwitches), fMultiline);
+            if fFound:
+                if sVer:
+                    printVerbose(1, f"Detected version for '{sCmdName}' is: {sVer}");
+                else:
+                    printVerbose(1, f"No version for '{sCmdName}' returned");
+                return sCmdPath, sVer;
             return sCmdPath, '<unknown>';
         except subprocess.SubprocessError as ex:
             printError(f"Error while checking version of {sToolDesc if sToolDesc else sCmdName}: {str(ex)}");
@@ -521,24 +772,6 @@ def getLinkerArgs(asLibPaths, asLibFiles, enmBuildTarget):
                 asLinkerArg += [ f'-l{sLibName}' ];
     return asLinkerArg;
 
-def hasCPPHeader(asHeader):
-    """
-    Rough guess which headers require C++.
-    Header selection is based on the library test programs of this file.
-
-    Returns True if it requires C++, False if C only.
-    """
-    if len(asHeader) == 0:
-        return False; # ASSUME C on empty headers.
-    asCPPHdr = [ 'c++', 'iostream', 'Qt', 'QtGlobal', 'qcoreapplication.h', 'stdsoap2.h' ];
-    for sCurHdr in asHeader:
-        if sCurHdr.endswith(('.hpp', '.hxx', '.hh')):
-            return True;
-        sMatch = [h for h in asCPPHdr if h in sCurHdr];
-        if sMatch:
-            return True;
-    return False;
-
 def getWinError(uCode):
     """
     Returns an error string for a given Windows error code.
@@ -596,45 +829,86 @@ def getPosixError(uCode):
         return f"Killed by signal {sName} ({sDesc})";
     return f"Killed by signal {sName}";
 
+def getTestCompiler(fCPP, enmBuildTarget = g_enmBuildTarget):
+    """
+    Returns the compiler to use for a (C or C++) test program.
+
+    Returns a tuple (fCPP, compiler path). The compiler path is None if not (yet) known.
+    """
+    if enmBuildTarget == BuildTarget.WINDOWS:
+        return True, g_oEnv['config_cpp_compiler'];
+    return fCPP, g_oEnv['config_cpp_compiler'] if fCPP else g_oEnv['config_c_compiler'];
+
+@functools.lru_cache(maxsize = None)
+def getTempDir():
+    """
+    Returns the temporary directory for test programs, shared by all checks of this run.
+    Created on first use and removed on exit, unless in debug mode (files are kept for inspection then).
+    """
+    import tempfile;
+    sTempDir = tempfile.mkdtemp(prefix = 'vboxcfg_');
+    if g_fDebug:
+        printLog(f"Keeping temporary directory '{sTempDir}'");
+    else:
+        import shutil;
+        atexit.register(shutil.rmtree, sTempDir, ignore_errors = True);
+    return sTempDir;
+
+# Per-thread temporary (sub)directory, see getWorkerTempDir().
+g_oTempDirTls = threading.local();
+
+def getWorkerTempDir():
+    """
+    Returns the temporary directory for test programs of the calling thread.
+    This is a subdirectory of getTempDir() per (worker) thread, so that concurrently running
+    checks don't all create and delete their files in the same directory.
+    """
+    sTempDir = getattr(g_oTempDirTls, 'sTempDir', None);
+    if sTempDir is None:
+        sSubDir  = 'vboxcfg_' + re.sub(r'[^\w.-]', '_', threading.current_thread().name);
+        sTempDir = os.path.join(getTempDir(), sSubDir);
+        try:
+            os.makedirs(sTempDir, exist_ok = True);
+        except OSError as ex:
+            printVerbose(1, f"Failed to create temporary directory '{sTempDir}': {str(ex)}");
+            sTempDir = getTempDir();
+        g_oTempDirTls.sTempDir = sTempDir;
+    return sTempDir;
+
 def compileAndExecute(sName, asIncPaths, asLibPaths, asIncFiles, asLibFiles, sCode, \
                       enmBuildTarget = g_enmBuildTarget, enmBuildArch = g_enmBuildArch,
-                      oEnv = None, asCompilerArgs = None, asLinkerArgs = None, asDefines = None, fLog = True, fErrorsAsWarnings = False):
+                      oEnv = None, asCompilerArgs = None, asLinkerArgs = None, asDefines = None, fLog = True, fErrorsAsWarnings = False,
+                      fCPP = False):
     """
-    Compiles and executes a test program.
+    Compiles and executes a (C, or C++ if fCPP is set) test program.
 
     Returns a tuple (Success, StdOut, StdErr).
     """
+    import subprocess;
     _ = enmBuildArch;
+    _ = asIncFiles;
     fRet = False;
     sStdOut = sStdErr = None;
 
     printVerbose(1, f'Compiling and executing "{sName}" ...');
 
-    if enmBuildTarget == BuildTarget.WINDOWS:
-        fCPP      = True;
-        sCompiler = g_oEnv['config_cpp_compiler'];
-    else:
-        fCPP      = hasCPPHeader(asIncFiles);
-        sCompiler = g_oEnv['config_cpp_compiler'] if fCPP else g_oEnv['config_c_compiler'];
+    fCPP, sCompiler = getTestCompiler(fCPP, enmBuildTarget);
     if not sCompiler:
         printError(f'No compiler found for test program "{sName}"');
         return False, None, None;
 
-    if g_fDebug:
-        sTempDir = tempfile.gettempdir();
-    else:
-        sTempDir = tempfile.mkdtemp();
-
-    asFilesToDelete = []; # For cleanup
+    sTempDir = getWorkerTempDir();
 
-    sFileSource = os.path.join(sTempDir, "testlib.cpp" if fCPP else "testlib.c");
-    asFilesToDelete.extend( [sFileSource] );
-    sFileImage  = os.path.join(sTempDir, "testlib" if enmBuildTarget != BuildTarget.WINDOWS else "testlib.exe");
-    asFilesToDelete.extend( [sFileImage] );
+    # Test programs might be compiled concurrently, so make the file names unique per check.
+    sFileBase   = 'testlib_' + re.sub(r'[^\w.+-]', '_', sName);
+    sFileImage  = os.path.join(sTempDir, sFileBase + getExeSuff(enmBuildTarget));
 
-    with open(sFileSource, "w", encoding = 'utf-8') as fh:
-        fh.write(sCode);
-    fh.close();
+    # GCC-style compilers read the source from stdin, so only MSVC needs a source file.
+    sFileSource = None;
+    if enmBuildTarget == BuildTarget.WINDOWS:
+        sFileSource = os.path.join(sTempDir, sFileBase + ".cpp");
+        with open(sFileSource, "w", encoding = 'utf-8') as fh:
+            fh.write(sCode);
 
     asCmd = [ sCompiler ];
     oProcEnv = EnvManager(oEnv.env if oEnv else g_oEnv.env);
@@ -658,6 +932,9 @@ def compileAndExecute(sName, asIncPaths, asLibPaths, asIncFiles, asLibFiles, sCo
         asCmd.extend( [ sFileSource ] );
         asCmd.extend( [ '/Fe:' + sFileImage ] );
     else: # Non-Windows
+        # Test programs don't need any optimization, and there is no need for intermediate files either.
+        # Put first, so that the compiler arguments of the check still can override this.
+        asCmd.extend( [ '-O0', '-pipe' ] );
         if asIncPaths:
             for sIncPath in asIncPaths:
                 asCmd.extend( [ f'-I{sIncPath}' ] );
@@ -667,7 +944,8 @@ def compileAndExecute(sName, asIncPaths, asLibPaths, asIncFiles, asLibFiles, sCo
         if asDefines:
             for sDefine in asDefines:
                 asCmd.extend( [ f'-D{sDefine}' ] );
-        asCmd.extend( [ sFileSource ] );
+        # Source comes from stdin; switch back to guessing the language by suffix for any following files.
+        asCmd.extend( [ '-x', 'c++' if fCPP else 'c', '-', '-x', 'none' ] );
         asCmd.extend( [ '-fPIC' ] );
         asCmd.extend( [ '-o', sFileImage ] );
         if asCompilerArgs:
@@ -683,12 +961,15 @@ def compileAndExecute(sName, asIncPaths, asLibPaths, asIncFiles, asLibFiles, sCo
         oProcEnv.printLog('    ', [ 'PATH', 'INCLUDE', 'LIB' ]);
         printLog( 'Process command line:');
         printLog(f'    {asCmd}');
+        printLog( 'Test program:');
+        printLog(sCode);
 
     try:
         # Add the compiler's path to PATH.
         oProcEnv.prependPath('PATH', os.path.dirname(sCompiler));
         # Try compiling the test source file.
-        oProc = subprocess.run(asCmd, env = oProcEnv.env, stdout = subprocess.PIPE, stderr = subprocess.STDOUT, check = False, timeout = 15);
+        oProc = subprocess.run(asCmd, input = None if sFileSource else sCode.encode('utf-8'), env = oProcEnv.env,
+                               stdout = subprocess.PIPE, stderr = subprocess.STDOUT, check = False, timeout = 15);
         if oProc.returncode != 0:
             sStdOut = oProc.stdout.decode("utf-8", errors="ignore");
             if fLog:
@@ -740,25 +1021,357 @@ def compileAndExecute(sName, asIncPaths, asLibPaths, asIncFiles, asLibFiles, sCo
         printError(f'    { " ".join(asCmd) }', fDontCount = True);
         printError(str(e));
 
-    # Clean up.
+    return fRet, sStdOut, sStdErr;
+
+class TestProbe:
+    """
+    Test program kinds enumeration, deciding how much of the toolchain is needed to evaluate a test program.
+    """
+    # Only prints macros; the preprocessor is enough.
+    MACRO_ONLY = "macro-only";
+    # Does not call anything (except printing a string literal); the compiler front end is enough.
+    SYNTAX_ONLY = "syntax-only";
+    # Needs to be compiled, linked and executed.
+    RUN = "run";
+
+# Matches test programs which only print (version) macros, e.g.
+#   int main() { printf("%d.%d", FOO_MAJOR, FOO_MINOR); return 0; }
+#   int main() { printf(FOO_VERSION); return 0; }
+g_reMacroOnlyMain = re.compile(r'int main\(\) \{ printf\((?:"(?P<fmt>[^"\\]*)"(?P<args>(?:, *[A-Z_][A-Z0-9_]*)+)|(?P<macro>[A-Z_][A-Z0-9_]*))\); return 0; \}');
+# Marker for finding the macro expansions in the preprocessor output.
+g_sMacroMarker = 'VBOXCFG_MACRO_VALUES';
+
+def evalIntExpr(oNode):
+    """
+    Evaluates a parsed integer constant expression (as found in version macros, e.g. "((2) * 10000 + 9)")
+    with C semantics. Anything else (casts, identifiers, floats, ...) is rejected.
+
+    Returns the integer value, or None if it can't be evaluated.
+    """
+    import ast;
+    if isinstance(oNode, ast.Expression):
+        return evalIntExpr(oNode.body);
+    # Note: Python < 3.8 produces ast.Num (with .n) for numbers instead of ast.Constant (with .value).
+    #       ast.Num is deprecated since 3.8, so only touch it on older versions.
+    if isinstance(oNode, ast.Constant if sys.version_info >= (3, 8) else (ast.Constant, ast.Num)):
+        oValue = oNode.value if isinstance(oNode, ast.Constant) else oNode.n;
+        return oValue if isinstance(oValue, int) and not isinstance(oValue, bool) else None;
+    if isinstance(oNode, ast.UnaryOp):
+        iOperand = evalIntExpr(oNode.operand);
+        if iOperand is None:
+            return None;
+        if isinstance(oNode.op, ast.USub):
+            return -iOperand;
+        if isinstance(oNode.op, ast.UAdd):
+            return iOperand;
+        if isinstance(oNode.op, ast.Invert):
+            return ~iOperand;
+        return None;
+    if isinstance(oNode, ast.BinOp):
+        iLeft  = evalIntExpr(oNode.left);
+        iRight = evalIntExpr(oNode.right);
+        if iLeft is None or iRight is None:
+            return None;
+        if isinstance(oNode.op, (ast.Div, ast.FloorDiv, ast.Mod)):
+            if iRight == 0:
+                return None;
+            iQuotient = abs(iLeft) // abs(iRight); # C truncates towards zero.
+            if (iLeft < 0) != (iRight < 0):
+                iQuotient = -iQuotient;
+            return iLeft - iQuotient * iRight if isinstance(oNode.op, ast.Mod) else iQuotient;
+        if isinstance(oNode.op, (ast.LShift, ast.RShift)) and not 0 <= iRight < 64:
+            return None;
+        dictOps = { ast.Add: lambda a, b: a + b, ast.Sub: lambda a, b: a - b, ast.Mult: lambda a, b: a * b,
+                    ast.LShift: lambda a, b: a << b, ast.RShift: lambda a, b: a >> b,
+                    ast.BitOr: lambda a, b: a | b, ast.BitAnd: lambda a, b: a & b, ast.BitXor: lambda a, b: a ^ b };
+        fnOp = dictOps.get(type(oNode.op));
+        return fnOp(iLeft, iRight) if fnOp else None;
+    return None;
+
+def getMacroValue(sExpansion):
+    """
+    Converts a macro expansion as output by the preprocessor into a Python value.
+    Only handles (concatenated) string literals and integer constant expressions.
+
+    Returns the value (string or integer), or None if it can't be converted.
+    """
+    import ast;
+    sExpansion = sExpansion.strip();
+    if not sExpansion.startswith('"'):
+        # Strip integer suffixes (U, L, UL, ULL, ...), Python does not know those.
+        sExpansion = re.sub(r'\b(0[xX][0-9a-fA-F]+|\d+)[uUlL]+\b', r'\1', sExpansion);
+        try:
+            return evalIntExpr(ast.parse(sExpansion, mode = 'eval'));
+        except (SyntaxError, ValueError, MemoryError, RecursionError):
+            return None;
     try:
-        if not g_fDebug:
-            for sFileToDel in asFilesToDelete:
-                try:
-                    os.remove(sFileToDel);
-                except PermissionError:
-                    pass;
-            os.rmdir(sTempDir);
-    except OSError as ex:
-        if fLog:
-            printVerbose(1, f"Failed to remove temporary files in '{sTempDir}': {str(ex)}");
+        oValue = ast.literal_eval(sExpansion);
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None;
+    if not isinstance(oValue, str):
+        return None;
+    return oValue;
 
-    return fRet, sStdOut, sStdErr;
+def getTestProbeType(sCode, enmBuildTarget = g_enmBuildTarget, fLinkRequired = None):
+    """
+    Classifies a test program.
+
+    fLinkRequired explicitly states whether the test program needs to be linked and executed;
+    if None, this is guessed from the test program itself.
+
+    Returns the TestProbe kind.
+    """
+    if enmBuildTarget == BuildTarget.WINDOWS: # Only the GCC-style driver invocation is implemented.
+        return TestProbe.RUN;
+    if fLinkRequired:
+        return TestProbe.RUN;
+    if g_reMacroOnlyMain.search(sCode):
+        return TestProbe.MACRO_ONLY;
+    if fLinkRequired is False:
+        return TestProbe.SYNTAX_ONLY;
+    # Preprocessor directives don't call anything at runtime, but might contain function-like macros.
+    sBody = '\n'.join(l for l in sCode.splitlines() if not l.lstrip().startswith('#'));
+    # Any return code other than 0 needs the program to run.
+    if re.search(r'\breturn\s+(?!0\s*;)', sBody):
+        return TestProbe.RUN;
+    # printf() with a plain string literal is fine, as we can figure out its output ourselves.
+    sBody = re.sub(r'\bprintf\(\s*"(?:[^"\\%]|\\.)*"\s*\)', '', sBody);
+    if any(sCall not in ('main', 'sizeof') for sCall in re.findall(r'\b([A-Za-z_]\w*)\s*\(', sBody)):
+        return TestProbe.RUN;
+    return TestProbe.SYNTAX_ONLY;
+
+def runCompilerFrontend(sName, asArgs, sCode, fCPP, asIncPaths = None, oEnv = None, asCompilerArgs = None, asDefines = None):
+    """
+    Runs the compiler with the given (mode) arguments on the given source code, fed via stdin.
+    Nothing gets written to disk.
+
+    Returns the finished process, or None if the compiler could not be run.
+    """
+    import subprocess;
+    sCompiler = g_oEnv['config_cpp_compiler'] if fCPP else g_oEnv['config_c_compiler'];
+    if not sCompiler:
+        return None;
+
+    asCmd = [ sCompiler ] + asArgs + [ '-x', 'c++' if fCPP else 'c' ];
+    if asIncPaths:
+        asCmd.extend([ f'-I{sIncPath}' for sIncPath in asIncPaths ]);
+    if asDefines:
+        asCmd.extend([ f'-D{sDefine}' for sDefine in asDefines ]);
+    if asCompilerArgs:
+        asCmd.extend(asCompilerArgs);
+    asCmd.extend([ '-' ]);
+
+    oProcEnv = EnvManager(oEnv.env if oEnv else g_oEnv.env);
+    oProcEnv.prependPath('PATH', os.path.dirname(sCompiler));
+    try:
+        return subprocess.run(asCmd, input = sCode.encode('utf-8'), env = oProcEnv.env, stdout = subprocess.PIPE, stderr = subprocess.PIPE,
+                              check = False, timeout = 15);
+    except (OSError, subprocess.SubprocessError) as ex:
+        printVerbose(1, f'Running compiler for {sName} failed: {str(ex)}');
+    return None;
+
+def checkSyntaxOnly(sName, asIncPaths, sCode, fCPP, oEnv = None, asCompilerArgs = None, asDefines = None, fErrorsAsWarnings = False):
+    """
+    Checks a test program which does not call anything by only letting the compiler parse it,
+    instead of compiling, linking and executing it.
+
+    Returns a tuple (Success, StdOut, StdErr) like compileAndExecute(),
+    or None if the test program can't be handled that way (use compileAndExecute() then).
+    """
+    import ast;
+    printVerbose(1, f'Checking syntax of "{sName}" ...');
+    oProc = runCompilerFrontend(sName, [ '-fsyntax-only' ], sCode, fCPP, asIncPaths, oEnv, asCompilerArgs, asDefines);
+    if not oProc:
+        return None;
+    if oProc.returncode != 0:
+        fnLog = printWarn if fErrorsAsWarnings else printError;
+        fnLog(f'Compilation of test program for {sName} failed');
+        fnLog(f'    { " ".join(oProc.args) }', fDontCount = True);
+        fnLog(oProc.stderr.decode('utf-8', errors = 'ignore'), fDontCount = True);
+        return False, None, None;
+    printLog(f'Syntax check of test program for {sName} successful');
+    # What the program would have printed.
+    asOutput = re.findall(r'\bprintf\(\s*("(?:[^"\\%]|\\.)*")\s*\)', sCode);
+    try:
+        return True, ''.join(ast.literal_eval(s) for s in asOutput).strip(), None;
+    except (ValueError, SyntaxError):
+        return True, '', None;
+
+def evaluateMacroProbe(sName, asIncPaths, sCode, fCPP, oEnv = None, asCompilerArgs = None, asDefines = None, fErrorsAsWarnings = False):
+    """
+    Evaluates a test program which only prints macros by running the preprocessor over it,
+    instead of compiling, linking and executing it.
+
+    Returns a tuple (Success, StdOut, StdErr) like compileAndExecute(),
+    or None if the test program can't be handled that way (use compileAndExecute() then).
+    """
+    oMatch = g_reMacroOnlyMain.search(sCode);
+    if not oMatch:
+        return None;
+    if oMatch.group('macro'):
+        sFmt     = '%s';
+        asMacros = [ oMatch.group('macro') ];
+    else:
+        sFmt     = oMatch.group('fmt');
+        asMacros = [ s.strip() for s in oMatch.group('args').split(',') if s.strip() ];
+    # Translate the C format string into a Python one (no length modifiers).
+    sFmt = re.sub(r'%(-?\d*)(?:hh|h|ll|l|z|j|t)?([diouxXs])', r'%\1\2', sFmt);
+
+    sSep   = f'{g_sMacroMarker}_SEP';
+    sInput = sCode[:oMatch.start()] + f'\n{g_sMacroMarker} {f" {sSep} ".join(asMacros)}\n' + sCode[oMatch.end():];
+
+    printVerbose(1, f'Preprocessing "{sName}" ...');
+    oProc = runCompilerFrontend(sName, [ '-E', '-P' ], sInput, fCPP, asIncPaths, oEnv, asCompilerArgs, asDefines);
+    if not oProc:
+        return None;
+    if oProc.returncode != 0:
+        fnLog = printWarn if fErrorsAsWarnings else printError;
+        fnLog(f'Preprocessing of test program for {sName} failed');
+        fnLog(f'    { " ".join(oProc.args) }', fDontCount = True);
+        fnLog(oProc.stderr.decode('utf-8', errors = 'ignore'), fDontCount = True);
+        return False, None, None;
+
+    for sLine in oProc.stdout.decode('utf-8', errors = 'ignore').splitlines():
+        if sLine.startswith(g_sMacroMarker + ' '):
+            aoValues = [ getMacroValue(s) for s in sLine[len(g_sMacroMarker) + 1:].split(sSep) ];
+            if None in aoValues:
+                return None; # Not something we can evaluate ourselves.
+            try:
+                sStdOut = sFmt % tuple(aoValues);
+            except (TypeError, ValueError):
+                return None;
+            printLog(f'Preprocessing test program for {sName} successful');
+            return True, sStdOut.strip(), None;
+    return None;
+
+class CompileCache:
+    """
+    Persistent cache for the results of successfully compiled and executed test programs.
+
+    Re-running configure on an unchanged system then does not need to build and run all
+    test programs again. Entries are keyed on everything which goes into the test program
+    and the modification times and sizes of the compiler and the header / library files used.
+    """
+
+    # Entries not used for this many seconds are dropped when loading the cache.
+    SECS_MAX_AGE = 30 * 24 * 60 * 60;
+
+    def __init__(self, sFilePath = None):
+        """
+        Initializes the cache. Nothing is loaded or saved if no file path is given.
+        """
+        self.sFilePath = sFilePath;
+        self.dictEntries = {};
+        self.oLock = threading.Lock();
+
+    def load(self):
+        """
+        Loads the cache from the cache file, if any.
+        A missing or unreadable cache file simply results in an empty cache.
+        Stale entries (and entries in an unknown format) are dropped.
+        """
+        import json;
+        import time;
+        if not self.sFilePath:
+            return;
+        try:
+            with open(self.sFilePath, 'r', encoding = 'utf-8') as fh:
+                dictEntries = json.load(fh);
+            if isinstance(dictEntries, dict):
+                rdOldest = time.time() - self.SECS_MAX_AGE;
+                self.dictEntries = { sKey: dictEntry for sKey, dictEntry in dictEntries.items() \
+                                     if  isinstance(dictEntry, dict) \
+                                     and isinstance(dictEntry.get('out'), str) \
+                                     and isinstance(dictEntry.get('ts'), (int, float)) \
+                                     and dictEntry['ts'] >= rdOldest };
+        except (OSError, ValueError) as ex:
+            printVerbose(1, f"Not using compile cache '{self.sFilePath}': {str(ex)}");
+
+    def save(self):
+        """
+        Saves the cache to the cache file, if any.
+        The file is written to a temporary file first and then renamed, so that an interrupted
+        or concurrently running configure never leaves a truncated cache file behind.
+        """
+        import json;
+        if not self.sFilePath:
+            return;
+        sTmpFilePath = f'{self.sFilePath}.{os.getpid()}.tmp';
+        try:
+            with self.oLock:
+                with open(sTmpFilePath, 'w', encoding = 'utf-8') as fh:
+                    json.dump(self.dictEntries, fh, indent = 1, sort_keys = True);
+            os.replace(sTmpFilePath, self.sFilePath);
+        except OSError as ex:
+            printVerbose(1, f"Failed to write compile cache '{self.sFilePath}': {str(ex)}");
+            try:
+                os.remove(sTmpFilePath);
+            except OSError:
+                pass;
+
+    def clean(self):
+        """
+        Removes all entries and the cache file, if any.
+        """
+        with self.oLock:
+            self.dictEntries = {};
+        if not self.sFilePath:
+            return;
+        try:
+            os.remove(self.sFilePath);
+        except FileNotFoundError:
+            pass;
+        except OSError as ex:
+            printWarn(f"Failed to remove compile cache '{self.sFilePath}': {str(ex)}");
+
+    @staticmethod
+    def getKey(asValues, asPaths):
+        """
+        Returns the cache key for the given values and (file system) paths.
+        Paths also contribute their modification time and size, so that (re-)installing stuff invalidates the entry.
+        """
+        import hashlib;
+        oHash = hashlib.blake2b(digest_size = 20);
+        for sValue in asValues:
+            oHash.update(f'{sValue}\0'.encode('utf-8'));
+        for sPath in asPaths:
+            try:
+                oStat = os.stat(sPath);
+                sStat = f'{oStat.st_mtime}|{oStat.st_size}';
+            except OSError:
+                sStat = None;
+            oHash.update(f'{sPath}|{sStat}\0'.encode('utf-8'));
+        return oHash.hexdigest();
+
+    def get(self, sKey):
+        """
+        Returns the cached output for the given key, or None if not cached.
+        """
+        import time;
+        with self.oLock:
+            dictEntry = self.dictEntries.get(sKey);
+            if dictEntry is None:
+                return None;
+            dictEntry['ts'] = time.time(); # Keep entries in use from expiring.
+            return dictEntry['out'];
+
+    def set(self, sKey, sStdOut):
+        """
+        Caches the output of a successful test program run.
+        """
+        import time;
+        with self.oLock:
+            self.dictEntries[sKey] = { 'out': sStdOut, 'ts': time.time() };
+
+# The compile cache. Set up by main() once the output directory is known.
+g_oCompileCache = CompileCache();
 
 def getPackageLibs(sPackageName):
     """
     Returns a tuple (success, list) of libraries of a given package.
     """
+    import glob;
+    import subprocess;
     try:
         #
         # Linux, Solaris and macOS
@@ -826,6 +1439,7 @@ def getPackageVar(sPackageName, enmPkgMgrVar : PkgMgrVar):
 
     Returns a tuple (Success status, Output [string, list]).
     """
+    import subprocess;
     try:
         if not enmPkgMgrVar:
             return True, '';
@@ -874,6 +1488,9 @@ def getPackagePath(sPackageName):
     """
     return getPackageVar(sPackageName, PkgMgrVar.PREFIX);
 
+# Translation table for turning (upper-cased) library / tool names into variable names.
+g_dictVarNameTrans = str.maketrans({ '+': 'PLUS', '-': '_' });
+
 class CheckBase:
     """
     Base class for checks.
@@ -883,6 +1500,8 @@ class CheckBase:
         Constructor.
         """
         self.sName = sName;
+        # Name as used for (kBuild) variables, e.g. "libgsoapssl++" -> "LIBGSOAPSSLPLUSPLUS".
+        self.sVarBase = sName.upper().translate(g_dictVarNameTrans);
         # Build target (i.e. BuildTarget.LINUX) to use.
         # Defaults to global build target if not explicitly specified.
         self.enmBuildTarget = enmBuildTarget;
@@ -895,6 +1514,9 @@ class CheckBase:
         self.aeArchs = [ BuildArch.ANY ] if aeArchs is None else aeArchs;
         # Defines the list of excluded targets NOT requiring this component.
         self.aeTargetsExcluded = aeTargetsExcluded if aeTargetsExcluded else [];
+        # Whether this component is handled by the build target / architecture (see isInTarget()).
+        # Determined once by setArgs(); None if not determined (yet).
+        self.fInTarget = None;
 
     def print(self, sMessage):
         """
@@ -984,9 +1606,10 @@ class CheckBase:
             pass;
         return (None, None);
 
-    def findFiles(self, sBaseDir, asFilePaths, fAbsolute = False, fStripFilenames = False):
+    def findFiles(self, sBaseDir, asFilePaths, fAbsolute = False, fStripFilenames = False, fCached = False):
         """
         Finds files in a base directory.
+        If fCached is set, the directory tree is only walked once per run (see getDirIndex()).
 
         Returns a tuple containing of
             - a dictionary of all passed-in files describing the found path (if any)
@@ -1000,12 +1623,7 @@ class CheckBase:
         sBaseDir = os.path.abspath(sBaseDir);
         printVerbose(2, f"Finding files in '{sBaseDir}': {asFilePaths}");
         # Walk directory and build a set of all files' relative paths
-        dictAllFilesInfo = {};
-        for sDirRoot, _, asFiles in os.walk(sBaseDir, followlinks = True):
-            for sCurFile in asFiles:
-                sFilePathRel = os.path.relpath(os.path.join(sDirRoot, sCurFile), sBaseDir)
-                sFilePathAbs = os.path.join(sBaseDir, sFilePathRel);
-                dictAllFilesInfo[sFilePathRel] = sFilePathAbs;
+        dictAllFilesInfo = getDirIndex(sBaseDir) if fCached else getDirIndex.__wrapped__(sBaseDir);
 
         for sCurFile in asFilePaths:
             sFilePathNorm = os.path.normpath(sCurFile);
@@ -1087,7 +1705,7 @@ class LibraryCheck(CheckBase):
                  enmBuildTarget = g_enmBuildTarget, enmBuildArch = g_enmBuildArch, aeTargets = None, aeArchs = None, sCode = None,
                  asIncPaths = None, asLibPaths = None,
                  fnCallback = None, aeTargetsExcluded = None, fUseInTree = False, sSdkName = None,
-                 dictDefinesToSetIfFailed = None):
+                 dictDefinesToSetIfFailed = None, fCPP = False, fLinkRequired = None, nCostHint = 1):
         """
         Constructor.
         """
@@ -1095,6 +1713,13 @@ class LibraryCheck(CheckBase):
 
         # List of library header (.h) files required to be found.
         self.asHdrFiles = asIncFiles or [];
+        # Whether the library needs C++ (for the test program and the header check).
+        self.fIsCPP = fCPP;
+        # Whether the test program needs to be linked and executed (True), only needs the compiler
+        # front end (False, e.g. for header-only or version macro checks) or None to figure that out from the code.
+        self.fLinkRequired = fLinkRequired;
+        # Rough relative cost of performing the check. Expensive checks are started first when checking concurrently.
+        self.nCostHint = nCostHint;
         # List of library shared object / static library names for this library check.
         # The first entry (index 0) is the main library of the check.
         # The following indices are for auxillary libraries needed.
@@ -1141,6 +1766,19 @@ class LibraryCheck(CheckBase):
         # Contains the (parsable) version string if detected.
         # Only valid if self.fHave is True.
         self.sVer = None;
+        # Whether the headers of the test program are available, as determined by batchHeaderProbe().
+        # None if not probed.
+        self.fHdrAvail = None;
+        # The headers of the test program batchHeaderProbe() did not find.
+        self.asHdrMissing = [];
+        # The include paths batchHeaderProbe() used for determining self.fHdrAvail.
+        self.asHdrProbeIncPaths = [];
+        # Cached result of getIncSearchPaths() as a tuple (inputs, paths); None if not determined yet.
+        self.tIncSearchPaths = None;
+        # Absolute paths of the header files found by checkHdr().
+        self.asHdrFilesFound = [];
+        # Absolute paths of the library files found by checkLib(). Empty if left to the linker.
+        self.asLibFilesFound = [];
 
     def getTestCode(self):
         """
@@ -1149,13 +1787,13 @@ class LibraryCheck(CheckBase):
         if not self.asHdrFiles:
             return '';
         if self.sCode:
-            if hasCPPHeader(self.asHdrFiles):
+            if self.fIsCPP:
                 return '#include <iostream>\n' + self.sCode;
             else:
                 return '#include <stdio.h>\n' + self.sCode;
         else:
             sIncludes = [f'#include <{h}>' for h in self.asHdrFiles];
-            if hasCPPHeader(self.asHdrFiles):
+            if self.fIsCPP:
                 return '\n'.join(sIncludes) + '#include <iostream>\nint main() {{ std::cout << "<found>" << std::endl; return 0; }}\n';
         return '\n'.join(sIncludes) + '#include <stdio.h>\nint main(void) {{ printf("<found>"); return 0; }}\n';
 
@@ -1174,11 +1812,50 @@ class LibraryCheck(CheckBase):
         self.asIncPaths = list(set(self.asIncPaths));
         self.asLibPaths = list(set(self.asLibPaths));
 
-        fRc, sStdOut, sStdErr = compileAndExecute(self.sName, \
-                                                  self.asIncPaths, self.asLibPaths, self.asHdrFiles, self.asLibFiles, \
-                                                  sCode, enmBuildTarget = self.enmBuildTarget, enmBuildArch = self.enmBuildArch,
-                                                  asCompilerArgs = self.asCompilerArgs, asLinkerArgs = self.asLinkerArgs, asDefines = self.asDefines,
-                                                  fErrorsAsWarnings = fErrorsAsWarnings);
+        fCPP, sCompiler = getTestCompiler(self.fIsCPP, self.enmBuildTarget);
+        # The compiler usually is stored by its bare name, so resolve it for getting its modification time.
+        # Its version goes into the key as well, so that a compiler upgrade invalidates cached results.
+        # Replacing a file in a sub directory does not touch the include / library directories, so the
+        # actually found header and library files go into the key as well.
+        sCompilerPath = (cachedWhich(sCompiler) if sCompiler else None) or sCompiler;
+        sKey = CompileCache.getKey([ self.sName, sCode, self.enmBuildTarget, self.enmBuildArch, self.asHdrFiles, self.asLibFiles,
+                                     self.asCompilerArgs, self.asLinkerArgs, self.asDefines, getCompilerVersion(sCompilerPath) ],
+                                   [ sCompilerPath ] + sorted(self.asIncPaths) + sorted(self.asLibPaths) \
+                                   + sorted(self.asHdrFilesFound) + sorted(self.asLibFilesFound));
+        sStdOut = g_oCompileCache.get(sKey);
+        if sStdOut is not None:
+            printLog(f'Using cached test program result for {self.sName}');
+            if sStdOut:
+                self.sVer = sStdOut;
+            return True, sStdOut, None;
+
+        # Don't use more of the toolchain than the test program actually needs.
+        enmProbe = getTestProbeType(sCode, self.enmBuildTarget, self.fLinkRequired);
+        tRc = None;
+        if enmProbe == TestProbe.MACRO_ONLY:
+            tRc = evaluateMacroProbe(self.sName, self.asIncPaths, sCode, fCPP, asCompilerArgs = self.asCompilerArgs,
+                                     asDefines = self.asDefines, fErrorsAsWarnings = fErrorsAsWarnings);
+        elif enmProbe == TestProbe.SYNTAX_ONLY:
+            tRc = checkSyntaxOnly(self.sName, self.asIncPaths, sCode, fCPP, asCompilerArgs = self.asCompilerArgs,
+                                  asDefines = self.asDefines, fErrorsAsWarnings = fErrorsAsWarnings);
+        if  tRc is None \
+        and enmProbe == TestProbe.MACRO_ONLY \
+        and self.fLinkRequired is False:
+            # The macro values can't be evaluated by us, but we were told to never link -- at least check the syntax.
+            tRc = checkSyntaxOnly(self.sName, self.asIncPaths, sCode, fCPP, asCompilerArgs = self.asCompilerArgs,
+                                  asDefines = self.asDefines, fErrorsAsWarnings = fErrorsAsWarnings);
+        if tRc is not None:
+            fRc, sStdOut, sStdErr = tRc;
+        else:
+            fRc, sStdOut, sStdErr = compileAndExecute(self.sName, \
+                                                      self.asIncPaths, self.asLibPaths, self.asHdrFiles, self.asLibFiles, \
+                                                      sCode, enmBuildTarget = self.enmBuildTarget, enmBuildArch = self.enmBuildArch,
+                                                      asCompilerArgs = self.asCompilerArgs, asLinkerArgs = self.asLinkerArgs,
+                                                      asDefines = self.asDefines, fErrorsAsWarnings = fErrorsAsWarnings, fCPP = fCPP);
+        # Only cache proper successes; failures must be re-evaluated every time so that fixing the system gets noticed.
+        if  fRc \
+        and sStdOut is not None:
+            g_oCompileCache.set(sKey, sStdOut);
         if fRc and sStdOut:
             self.sVer = sStdOut;
         return fRc, sStdOut, sStdErr;
@@ -1187,6 +1864,7 @@ class LibraryCheck(CheckBase):
         """
         Applies argparse options for disabling and custom paths.
         """
+        self.fInTarget = self.isInTarget();
         fUseInTree = getattr(args, f'config_libs_build_{self.sName.replace("-", "_")}', None);
         if fUseInTree:
             self.fUseInTree = fUseInTree; # Only set if explicitly specified on command line -- otherwise take the lib's default.
@@ -1208,6 +1886,7 @@ class LibraryCheck(CheckBase):
         Will return a tuple (root path, in tree) of the library, or (None, False) if not found.
         This also will take care of custom root paths (if specified).
         """
+        import glob;
         sRootPath = self.sRootPath; # A custom path has precedence.
         fInTree   = False;
         if sRootPath:
@@ -1276,6 +1955,21 @@ class LibraryCheck(CheckBase):
     def getIncSearchPaths(self):
         """
         Returns a list of existing search directories for includes.
+        Determined once (per root path / in-tree setting), as both the header probe and the check need it.
+        """
+        if self.fInTarget is False:
+            return [];
+        tInputs = (self.sRootPath, self.fUseInTree);
+        if  self.tIncSearchPaths is not None \
+        and self.tIncSearchPaths[0] == tInputs:
+            return list(self.tIncSearchPaths[1]);
+        asPaths = self.determineIncSearchPaths();
+        self.tIncSearchPaths = (tInputs, asPaths);
+        return list(asPaths);
+
+    def determineIncSearchPaths(self):
+        """
+        Determines the existing search directories for includes, see getIncSearchPaths().
         """
         self.printVerbose(1, 'Determining include search paths');
 
@@ -1304,11 +1998,7 @@ class LibraryCheck(CheckBase):
             #
             # Desperate fallback.
             #
-            asRootDrivers = [ d+":" for d in "CDEFGHIJKLMNOPQRSTUVWXYZ" if pathExists(d+":", fNoLog = True) ];
-            for r in asRootDrivers:
-                asPaths.extend([ os.path.join(r, p) for p in [
-                    "\\msys64\\mingw64\\include", "\\msys64\\mingw32\\include", "\\include" ]]);
-                asPaths.extend([ r"c:\\Program Files", r"c:\\Program Files (x86)" ]);
+            asPaths.extend(getWinFallbackSearchPaths('include'));
 
         #
         # macOS (Darwin)
@@ -1321,10 +2011,7 @@ class LibraryCheck(CheckBase):
         # Linux
         #
         elif self.enmBuildTarget == BuildTarget.LINUX:
-            # Sorted by most likely-ness.
-            asPaths.extend([ "/usr/include", "/usr/local/include",
-                             "/usr/include/" + self.sName, "/usr/local/include/" + self.sName,
-                             "/opt/include", "/opt/local/include" ]);
+            asPaths.extend([ sPath.format(self.sName) for sPath in g_dictIncSearchPaths[BuildTarget.LINUX] ]);
         #
         # Walk the custom path to guess where the include files are.
         #
@@ -1334,12 +2021,14 @@ class LibraryCheck(CheckBase):
                     if sIncFile in asFiles:
                         asPaths = [ sRoot ] + asPaths;
 
-        return [p for p in asPaths if isDir(p)];
+        return [p for p in asPaths if isDir(p, fCached = True)];
 
     def getLibSearchPaths(self):
         """
         Returns a list of existing search directories for libraries.
         """
+        if self.fInTarget is False:
+            return [];
         self.printVerbose(1, 'Determining library search paths');
 
         asPaths = [];
@@ -1370,24 +2059,16 @@ class LibraryCheck(CheckBase):
             #
             # Desperate fallback.
             #
-            asRootDrives = [d+":" for d in "CDEFGHIJKLMNOPQRSTUVWXYZ" if pathExists(d+":", fNoLog = True)];
-            for r in asRootDrives:
-                asPaths += [os.path.join(r, p) for p in [
-                    '\\msys64\\mingw64\\lib', '\\msys64\\mingw32\\lib', '\\lib']];
-                asPaths += [r'c:\\Program Files', r'c:\\Program Files (x86)'];
+            asPaths.extend(getWinFallbackSearchPaths('lib'));
         #
         # Linux / MacOS / Solaris
         #
         else:  # Linux / MacOS / Solaris
             if self.enmBuildTarget == BuildTarget.LINUX \
             or self.enmBuildTarget == BuildTarget.SOLARIS:
-                # Sorted by most likely-ness.
-                asPaths.extend([ "/lib", "/lib64",
-                                 "/usr/lib", "/usr/local/lib",
-                                 "/usr/lib64", "/lib", "/lib64",
-                                 "/opt/lib", "/opt/local/lib" ]);
+                asPaths.extend(g_dictLibSearchPaths[BuildTarget.LINUX]);
             else: # Darwin
-                asPaths.append("/opt/homebrew/lib");
+                asPaths.extend(g_dictLibSearchPaths[BuildTarget.DARWIN]);
         #
         # Walk the custom path to guess where the lib files are.
         #
@@ -1398,7 +2079,7 @@ class LibraryCheck(CheckBase):
                         if isFile(sLibFile):
                             asPaths = [ sRoot ] + asPaths;
 
-        return [p for p in asPaths if pathExists(p)];
+        return [p for p in asPaths if pathExists(p, fCached = True)];
 
     def checkHdr(self):
         """
@@ -1407,12 +2088,13 @@ class LibraryCheck(CheckBase):
         Returns a tuple of (True, list of lib paths found) on success or (False, None) on failure.
         """
         self.printVerbose(1, 'Checking headers ...');
-        if not self.asHdrFiles:
+        if  not self.asHdrFiles \
+        or  self.fInTarget is False:
             return True, [];
         asHdrToSearch = [];
         if self.asHdrFiles:
             asHdrToSearch.extend(self.asHdrFiles);
-        if hasCPPHeader(self.asHdrFiles):
+        if self.fIsCPP:
             asHdrToSearch.extend([ 'iostream' ]); # Non-library headers must come last.
 
         setHdrFound = {}; # Key = Header file, Value = Path to header file.
@@ -1420,20 +2102,30 @@ class LibraryCheck(CheckBase):
         asSearchPath = self.asIncPaths + self.getIncSearchPaths(); # Own include paths have precedence.
         self.printVerbose(2, f"Search paths: {asSearchPath}");
         for sCurSearchPath in asSearchPath:
-            asResults, _ = self.findFiles(sCurSearchPath, asHdrToSearch, fAbsolute = True, fStripFilenames = True);
-            for sResIncFile, dictRes in asResults.items():
-                sIncPath = dictRes['found_path'];
-                if  sIncPath \
-                and sResIncFile not in setHdrFound: # Take the first match found.
-                    setHdrFound[sResIncFile] = sIncPath;
+            asHdrLeft = [ sHdr for sHdr in asHdrToSearch if sHdr not in setHdrFound ]; # Take the first match found.
+            if not asHdrLeft:
+                break;
+            # Other libraries might have searched for the same headers in the same path already.
+            asHdrUncached = [ sHdr for sHdr in asHdrLeft if (sCurSearchPath, sHdr) not in g_dictHdrFound ];
+            if asHdrUncached:
+                asResults, _ = self.findFiles(sCurSearchPath, asHdrUncached, fAbsolute = True, fStripFilenames = True, fCached = True);
+                for sHdr in asHdrUncached:
+                    dictRes = asResults.get(sHdr);
+                    g_dictHdrFound[(sCurSearchPath, sHdr)] = dictRes['found_path'] if dictRes else None;
+            for sHdr in asHdrLeft:
+                sIncPath = g_dictHdrFound[(sCurSearchPath, sHdr)];
+                if sIncPath:
+                    setHdrFound[sHdr] = sIncPath;
 
         fRc = True;
 
         asIncPaths = [];
+        self.asHdrFilesFound = [];
         self.printVerbose(1, 'Found header files:');
         for sHdr, sPath in setHdrFound.items():
             self.printVerbose(1, f'\t{os.path.join(sPath, sHdr)}');
             asIncPaths.extend([ sPath ]);
+            self.asHdrFilesFound.append(os.path.join(sPath, sHdr));
 
         for sHdr in asHdrToSearch:
             if sHdr not in setHdrFound:
@@ -1454,6 +2146,9 @@ class LibraryCheck(CheckBase):
         if not self.asLibFiles:
             self.printVerbose(1, 'No libraries defined, skipping');
             return True, [], [];
+        if self.fInTarget is False:
+            self.printVerbose(1, 'Not handled by build target, skipping');
+            return True, [], [];
         if self.fUseInTree:
             self.printVerbose(1, 'Library needs to be used in-tree and thus is source only, skipping');
             return True, [], [];
@@ -1467,19 +2162,30 @@ class LibraryCheck(CheckBase):
         asSearchPath = self.asLibPaths + self.getLibSearchPaths(); # Own lib paths have precedence.
         setLibFound  = {}; # Key = Lib file, Value = Path to lib file.
         asLibToSearch = self.asLibFiles;
+        # Precompile the file name patterns of all libraries. Library names without suffix also
+        # match versioned shared objects (e.g. libfoo.so.1.2).
+        # Note: The library name might contain a sub directory, so split that off first.
+        # Note: File names are case-insensitive on Windows.
+        fReFlags = re.IGNORECASE if self.enmBuildTarget == BuildTarget.WINDOWS else 0;
+        aLibPatterns = [];
+        for sCurLib in asLibToSearch:
+            sSubDir, sName = os.path.split(sCurLib);
+            if hasLibSuff(sCurLib):
+                oRe = re.compile(re.escape(sName) + '$', fReFlags);
+            else:
+                oRe = re.compile(re.escape(sName + getLibSuff(fStatic)) + r'(\.\d+)*$', fReFlags);
+            aLibPatterns.append((sCurLib, sSubDir, oRe));
         self.printVerbose(2, f"Search paths: {asSearchPath}");
         for sCurSearchPath in asSearchPath:
-            for sCurLib in asLibToSearch:
-                if hasLibSuff(sCurLib):
-                    sPattern = os.path.join(sCurSearchPath, sCurLib);
-                else:
-                    sPattern = os.path.join(sCurSearchPath, f"{sCurLib}{getLibSuff(fStatic)}*");
-                self.printVerbose(2, f"Checking '{sPattern}'");
-                for sCurFile in glob.glob(sPattern):
+            for sCurLib, sSubDir, oRe in aLibPatterns:
+                if sCurLib in setLibFound:
+                    continue;
+                sDir = os.path.join(sCurSearchPath, sSubDir);
+                self.printVerbose(2, f"Checking '{sDir}' for '{oRe.pattern}'");
+                for sCurFile in [ os.path.join(sDir, s) for s in listDir(sDir) if oRe.match(s) ]:
                     if isFile(sCurFile) \
                     or os.path.islink(sCurFile):
-                        if sCurLib not in setLibFound:
-                            setLibFound[sCurLib] = sCurFile;
+                        setLibFound[sCurLib] = sCurFile;
                         break;
 
         fRc = True;
@@ -1500,6 +2206,7 @@ class LibraryCheck(CheckBase):
 
         if fRc:
             self.printVerbose(1, 'All libraries found');
+            self.asLibFilesFound = asLibFiles;
             return True, asLibPaths, asLibFiles;
 
         return False, None, None;
@@ -1538,7 +2245,8 @@ class LibraryCheck(CheckBase):
             - False if required but not found
             - True if found
         """
-        if self.fDisabled:
+        if  self.fDisabled \
+        or  self.fInTarget is False:
             self.fHave = None;
             return self.fHave;
 
@@ -1566,8 +2274,16 @@ class LibraryCheck(CheckBase):
                     #   or
                     #   - there are defines to disable the feature.
                     fMayFail = self.fUseInTree or len(self.dictDefinesToSetIfFailed) > 0;
-                    # Only try to compile libraries which are not in-tree, as we only have sources in-tree, not binaries.
-                    fRc, _, _ = self.compileAndExecute(fErrorsAsWarnings = fMayFail);
+                    # Don't bother compiling if we already know that the headers are missing. This only holds
+                    # if the compiler would not get any include paths the batch probe did not look into.
+                    if      self.fHdrAvail is False \
+                    and set(self.asIncPaths).issubset(self.asHdrProbeIncPaths):
+                        fnLog = self.printWarn if fMayFail else self.printError;
+                        fnLog(f'Header files of test program not found: {", ".join(self.asHdrMissing)}');
+                        fRc = False;
+                    else:
+                        # Only try to compile libraries which are not in-tree, as we only have sources in-tree, not binaries.
+                        fRc, _, _ = self.compileAndExecute(fErrorsAsWarnings = fMayFail);
                     if not fRc:
                         self.fHave = None if fMayFail else False;
                     else:
@@ -1778,6 +2494,15 @@ class LibraryCheck(CheckBase):
     def __repr__(self):
         return f"{self.getStatusString()}";
 
+# The sub directories OpenWatcom ships its binaries in, per build target.
+g_dictOpenWatcomBinSubdirs = {
+    BuildTarget.DARWIN:  "binosx",  ## @todo Still correct for Apple Silicon?
+    BuildTarget.LINUX:   "binl",    # ASSUMES 64-bit.
+    BuildTarget.SOLARIS: "binsol",  ## @todo Test on Solaris.
+    BuildTarget.WINDOWS: "binnt",
+    BuildTarget.BSD:     "binnbsd"  ## @todo Test this on FreeBSD.
+};
+
 class ToolCheck(CheckBase):
     """
     Describes and checks for a build tool.
@@ -1819,6 +2544,7 @@ class ToolCheck(CheckBase):
         """
         Apply argparse options for disabling the tool.
         """
+        self.fInTarget = self.isInTarget();
         sToolName = self.sName.replace("-", "_"); # So that we can use variables directly w/o getattr.
         self.fDisabled = getattr(oArgs, f"config_tools_disable_{sToolName}", False);
         self.sRootPath = getattr(oArgs, f"config_tools_path_{sToolName}", None);
@@ -1836,6 +2562,7 @@ class ToolCheck(CheckBase):
 
         Will return (None, False) if not found.
         """
+        import glob;
         sRootPath = self.sRootPath; # A custom path has precedence.
         fInTree   = False;
         if sRootPath:
@@ -1870,7 +2597,8 @@ class ToolCheck(CheckBase):
             - False if required but not found
             - True if found
         """
-        if self.fDisabled:
+        if  self.fDisabled \
+        or  self.fInTarget is False:
             self.fHave = None;
             return self.fHave;
 
@@ -1946,6 +2674,7 @@ class ToolCheck(CheckBase):
         """
         Checks for the GSOAP compiler. Needed for the webservices.
         """
+        import glob;
 
         sPath = self.sRootPath; # Acts as the 'found' beacon.
         if not sPath:
@@ -2042,6 +2771,7 @@ class ToolCheck(CheckBase):
         """
         Checks for Java.
         """
+        import subprocess;
 
         # Detect Java home directory.
         fRc       = True;
@@ -2075,7 +2805,9 @@ class ToolCheck(CheckBase):
             for sCmd, (asRegEx) in mapCmds.items():
                 for sRegEx in asRegEx:
                     try:
-                        _, sVer = checkWhich(sCmd, sCustomPath = os.path.join(sJavaHome, 'bin') if sJavaHome else None);
+                        # Note: Java 8 and older only know '-version' (and print the version to stderr).
+                        _, sVer = checkWhich(sCmd, sCustomPath = os.path.join(sJavaHome, 'bin') if sJavaHome else None,
+                                             asVersionSwitches = [ '-version', '--version' ]);
                         reMatch = re.search(sRegEx, sVer);
                         if reMatch:
                             uMaj = int(reMatch.group(1));
@@ -2094,7 +2826,7 @@ class ToolCheck(CheckBase):
                             # See also: https://openjdk.org/jeps/320
                             if uMaj > 8:
                                 # Check if 'wsimport' installed via other packages onto the system.
-                                _, sVer = checkWhich('wsimport');
+                                _, sVer = checkWhich('wsimport', asVersionSwitches = [ '-version', '--version' ]);
                                 if not sVer:
                                     self.printWarn(f"Java {uMaj} installed ({sCmd}), which does not include the 'wsimport' binary anymore.");
                                     self.printWarn( "Please either install Java <= 8, or install 'wsimport' according to your distribution / OS.", fDontCount = True);
@@ -2188,6 +2920,9 @@ class ToolCheck(CheckBase):
         """
         Checks for Visual C++ Build Tools 16 (2019), 15 (2017), 14 (2015), 12 (2013), 11 (2012) or 10 (2010).
         """
+        import fnmatch;
+        import glob;
+        import subprocess;
 
         sVCPPPath = self.sRootPath;
         sVCPPVer  = self.getVersionFromString(os.path.basename(self.sRootPath), fAsString = True) if self.sRootPath else None;
@@ -2657,16 +3392,7 @@ class ToolCheck(CheckBase):
             self.printVerbose(1, 'Open Watcom not used here (yet), skipping');
             return True;
 
-        # These are the sub directories OpenWatcom ships its binaries in.
-        mapBuildTarget2Bin = {
-            BuildTarget.DARWIN:  "binosx",  ## @todo Still correct for Apple Silicon?
-            BuildTarget.LINUX:   "binl" if self.enmBuildArch is BuildArch.AMD64 else "binl", # ASSUMES 64-bit.
-            BuildTarget.SOLARIS: "binsol",  ## @todo Test on Solaris.
-            BuildTarget.WINDOWS: "binnt",
-            BuildTarget.BSD:     "binnbsd"  ## @todo Test this on FreeBSD.
-        };
-
-        sBinSubdir = mapBuildTarget2Bin.get(self.enmBuildTarget, None);
+        sBinSubdir = g_dictOpenWatcomBinSubdirs.get(self.enmBuildTarget, None);
         if not sBinSubdir:
             self.printError(f"Open Watcom not supported on host target { self.enmBuildTarget }.");
             return False;
@@ -2683,7 +3409,7 @@ class ToolCheck(CheckBase):
         for sCmdCur in self.asCmd:
             # Open Watcom 2.x prints its version info on the second line, so we have to use multiline output.
             self.sCmdPath, self.sVer = checkWhich(sCmdCur, 'OpenWatcom', os.path.join(sPath, sBinSubdir) if sPath else None,
-                                                  fMultiline = True);
+                                                  asVersionSwitches = [ '/?', '/h', '/help', '-version' ], fMultiline = True);
             if self.sVer:
                 if  isinstance(self.sVer, list) \
                 and len(self.sVer) >= 2:
@@ -2792,20 +3518,23 @@ int main()
         """
         Checks for Xcode and Command Line Tools on macOS.
         """
-
         asPathsToCheck = [];
         if self.sRootPath:
             asPathsToCheck.append(self.sRootPath);
 
         #
         # Detect Xcode.
+        # Not needed if the given root path already contains the CommandLineTools.
         #
-        try:
-            oProc = subprocess.run(['xcode-select', '-p'], capture_output = True, check = False, universal_newlines = True)
-            if oProc.returncode == 0:
-                asPathsToCheck.extend([ oProc.stdout.strip() ]);
-        except subprocess.SubprocessError:
-            pass;
+        if not self.sRootPath \
+        or not isFile(os.path.join(self.sRootPath, 'usr/bin/clang')):
+            import subprocess;
+            try:
+                oProc = subprocess.run(['xcode-select', '-p'], capture_output = True, check = False, universal_newlines = True)
+                if oProc.returncode == 0:
+                    asPathsToCheck.extend([ oProc.stdout.strip() ]);
+            except (OSError, subprocess.SubprocessError):
+                pass;
 
         fRc = False;
 
@@ -2902,6 +3631,7 @@ int main()
         """
         Checks for WiX (Windows Installer XML, >= 5.0).
         """
+        import glob;
         sPath = self.sRootPath;
         if not sPath:
             # Search default installation paths.
@@ -2945,14 +3675,22 @@ class FileWriter:
             for sLine in content:
                 self.asLines.append(sLine);
 
+    def getContents(self):
+        """
+        Returns the contents of the output file, as written by save().
+        """
+        return ''.join(sLine + '\n' for sLine in self.asLines if sLine);
+
     def save(self):
         """
         Writes all buffered lines to the output file.
+
+        Returns the written contents.
         """
+        sContents = self.getContents();
         with open(self.filename, 'w', encoding = 'utf-8') as f:
-            for sLine in self.asLines:
-                if sLine:
-                    f.write(sLine + '\n');
+            f.write(sContents);
+        return sContents;
 
 class EnvMgrWriter(FileWriter):
     """ Abstract class to write key=value pairs from the EnvManager class. """
@@ -2994,10 +3732,13 @@ class MakefileWriter(EnvMgrWriter):
         """
         Writes all environment variables based on the include / exclude paramters.
         """
+        # str.startswith() takes a tuple of prefixes.
+        tPrefixExclude = tuple(asPrefixExclude) if asPrefixExclude else None;
+        tPrefixInclude = tuple(asPrefixInclude) if asPrefixInclude else None;
         for sKey, sVal in self.oEnvMgr.env.items():
-            if asPrefixExclude and any(sKey.startswith(p) for p in asPrefixExclude):
+            if tPrefixExclude and sKey.startswith(tPrefixExclude):
                 continue;
-            if asPrefixInclude and not any(sKey.startswith(p) for p in asPrefixInclude):
+            if tPrefixInclude and not sKey.startswith(tPrefixInclude):
                 continue;
             self.write(sKey, sVal);
 
@@ -3032,10 +3773,13 @@ class EnvFileWriter(EnvMgrWriter):
         """
         Writes all environment variables based on the include / exclude paramters.
         """
+        # str.startswith() takes a tuple of prefixes.
+        tPrefixExclude = tuple(asPrefixExclude) if asPrefixExclude else None;
+        tPrefixInclude = tuple(asPrefixInclude) if asPrefixInclude else None;
         for sKey, sVal in self.oEnvMgr.env.items():
-            if asPrefixExclude and any(sKey.startswith(p) for p in asPrefixExclude):
+            if tPrefixExclude and sKey.startswith(tPrefixExclude):
                 continue;
-            if asPrefixInclude and not any(sKey.startswith(p) for p in asPrefixInclude):
+            if tPrefixInclude and not sKey.startswith(tPrefixInclude):
                 continue;
             self.write(sKey, sVal);
 
@@ -3044,13 +3788,16 @@ class EnvManager:
     A simple manager for environment variables.
     """
 
-    def __init__(self, env = None):
+    def __init__(self, env = None, fDeferSets = False):
         """
         Initializes an environment variable store.
 
         If not environment block is defined, the process' default environment will be applied.
+        If fDeferSets is set, values set by concurrently performed checks get applied in check order
+        (see deferCall()), so that the resulting order of the variables is stable.
         """
         self.env = env.copy() if env else os.environ.copy();
+        self.fDeferSets = fDeferSets;
 
     def set(self, sKey, sVal):
         """
@@ -3061,6 +3808,9 @@ class EnvManager:
         if sVal is None:
             return;
         assert isinstance(sVal, str);
+        if  self.fDeferSets \
+        and deferCall(self.set, sKey, sVal):
+            return;
         printVerbose(2, f"EnvManager: Setting {sKey}={sVal}");
         self.env[sKey] = sVal;
 
@@ -3126,14 +3876,34 @@ class EnvManager:
                     aValueNew = sKey[idxSep + 1:];
                     self.set(sKeyNew, str(aValueNew));
 
-    def transform(self, mapTransform):
+    def applyRules(self, aRules):
         """
-        Evaluates mapping expressions and updates the affected environment variables.
+        Applies a table of (condition, updates) rules in a single pass and updates the affected environment variables.
+
+        A condition is either a variable name (applies if set to a non-empty value), a tuple of variable
+        names (applies if any of them is), or a callable taking the environment manager.
+        Update values can be callables taking the environment manager, for values derived from other variables.
+
+        All conditions are evaluated against the environment as it was before applying any of the rules;
+        for updates of the same variable the last applying rule wins.
         """
-        for exprCur in mapTransform:
-            result = exprCur(self.env);
-            if isinstance(result, dict):
-                self.env.update(result);
+        dictCache   = {};
+        dictUpdates = {};
+        def getCached(sKey):
+            if sKey not in dictCache:
+                dictCache[sKey] = self.env.get(sKey);
+            return dictCache[sKey];
+        for oCondition, dictRule in aRules:
+            if callable(oCondition):
+                fApplies = oCondition(self);
+            elif isinstance(oCondition, str):
+                fApplies = getCached(oCondition);
+            else:
+                fApplies = any(getCached(sKey) for sKey in oCondition);
+            if fApplies:
+                for sKey, oValue in dictRule.items():
+                    dictUpdates[sKey] = oValue(self) if callable(oValue) else oValue;
+        self.env.update(dictUpdates);
 
     def printLog(self, sPrefix, asKeys = None):
         """
@@ -3155,7 +3925,7 @@ class EnvManager:
 
 # Global instance of the environment manager.
 # This hold the configuration we later serialize into files.
-g_oEnv = EnvManager();
+g_oEnv = EnvManager(fDeferSets = True);
 
 class SimpleTable:
     """
@@ -3185,7 +3955,7 @@ class SimpleTable:
 
         # Compute maximum width for each column.
         aRows = [self.asHeaders] + self.aRows;
-        aColWidths = [max(len(str(row[i])) for row in aRows) for i in range(len(self.asHeaders))];
+        aColWidths = [max(map(len, asCol)) for asCol in zip(*aRows)]; # Cells are strings already, see addRow().
         sFmt = '  '.join('{{:<{}}}'.format(w) for w in aColWidths);
 
         print(sFmt.format(*self.asHeaders));
@@ -3193,6 +3963,138 @@ class SimpleTable:
         for row in self.aRows:
             print(sFmt.format(*row));
 
+def batchHeaderProbe(aoLibs):
+    """
+    Determines for the given libraries whether the headers included by their test programs are available,
+    using __has_include() in one preprocessor run per language (C and C++) instead of one compiler run per library.
+    The preprocessor runs for both languages are done concurrently.
+
+    Sets fHdrAvail of the probed libraries. Libraries which need special treatment
+    (callbacks, custom paths or arguments) are left alone and will be checked as usual.
+    """
+    import subprocess;
+    if g_enmBuildTarget == BuildTarget.WINDOWS:
+        return;
+
+    # Build one translation unit per language.
+    dictProbes = {}; # fCPP -> (list of libraries, include paths, source lines)
+    for oLib in aoLibs:
+        if oLib.fDisabled \
+        or oLib.fnCallback \
+        or oLib.sRootPath \
+        or oLib.asIncPaths \
+        or oLib.asCompilerArgs \
+        or oLib.asDefines:
+            continue;
+        asHdrs = list(dict.fromkeys(re.findall(r'^\s*#\s*include\s*<([^>]+)>', oLib.getTestCode(), re.MULTILINE)));
+        if not asHdrs:
+            continue;
+        aoProbe, asIncPaths, asSource = dictProbes.setdefault(oLib.fIsCPP, ([], [], [ '#ifdef __has_include' ]));
+        for sPath in oLib.getIncSearchPaths():
+            if sPath not in asIncPaths:
+                asIncPaths.append(sPath);
+        # One marker per header, so that the missing ones can be named.
+        for idxHdr, sHdr in enumerate(asHdrs):
+            asSource.extend([ f'#if __has_include(<{sHdr}>)',
+                              f'VBOXCFG_HDR_{len(aoProbe)}_{idxHdr} 1',
+                               '#else',
+                              f'VBOXCFG_HDR_{len(aoProbe)}_{idxHdr} 0',
+                               '#endif' ]);
+        aoProbe.append((oLib, asHdrs));
+
+    # Start the preprocessor for all translation units first, then collect the results.
+    aoRuns = [];
+    for fCPP, (aoProbe, asIncPaths, asSource) in dictProbes.items():
+        _, sCompiler = getTestCompiler(fCPP, g_enmBuildTarget);
+        if not sCompiler:
+            continue;
+        asSource.extend([ '#endif', '' ]);
+        asCmd = [ sCompiler, '-E', '-P', '-x', 'c++' if fCPP else 'c' ] + [ f'-I{sPath}' for sPath in asIncPaths ] + [ '-' ];
+        printVerbose(1, f'Probing headers of {len(aoProbe)} {"C++" if fCPP else "C"} libraries ...');
+        try:
+            oProc = subprocess.Popen(asCmd, stdin = subprocess.PIPE, stdout = subprocess.PIPE, stderr = subprocess.STDOUT);
+        except OSError as ex:
+            printVerbose(1, f'Probing headers failed: {str(ex)}');
+            continue;
+        aoRuns.append((oProc, '\n'.join(asSource).encode('utf-8'), aoProbe, asIncPaths));
+
+    for oProc, abInput, aoProbe, asIncPaths in aoRuns:
+        try:
+            abStdOut, _ = oProc.communicate(input = abInput, timeout = 15);
+        except subprocess.SubprocessError as ex:
+            oProc.kill();
+            oProc.communicate();
+            printVerbose(1, f'Probing headers failed: {str(ex)}');
+            continue;
+        sStdOut = abStdOut.decode('utf-8', errors = 'ignore');
+        if oProc.returncode != 0:
+            printVerbose(1, f'Probing headers failed: {sStdOut}');
+            continue;
+        dictFound = {}; # (library index, header index) -> whether found.
+        for oMatch in re.finditer(r'^VBOXCFG_HDR_(\d+)_(\d+) ([01])$', sStdOut, re.MULTILINE):
+            dictFound[(int(oMatch.group(1)), int(oMatch.group(2)))] = oMatch.group(3) == '1';
+        for idxLib, (oLib, asHdrs) in enumerate(aoProbe):
+            afFound = [ dictFound.get((idxLib, idxHdr)) for idxHdr in range(len(asHdrs)) ];
+            if None in afFound: # Incomplete output, leave it to the regular check.
+                continue;
+            oLib.asHdrMissing       = [ sHdr for sHdr, fFound in zip(asHdrs, afFound) if not fFound ];
+            oLib.fHdrAvail          = not oLib.asHdrMissing;
+            oLib.asHdrProbeIncPaths = asIncPaths;
+            if oLib.fHdrAvail:
+                printLog(f'Headers of test program for {oLib.sName} found');
+            else:
+                printLog(f'Headers of test program for {oLib.sName} not found: {", ".join(oLib.asHdrMissing)}');
+
+def runParallel(fnWork, aoItems, fnCost = None):
+    """
+    Calls fnWork for each of the given (independent) items concurrently.
+
+    The work mostly consists of waiting for child processes, so threads are sufficient here.
+    The output of each item, as well as the error / warning messages and configuration changes,
+    are buffered and applied in the order of the given items, so that the result is the same as if
+    the items were processed serially. If an item raises an exception, its buffered output
+    is written out before the exception is re-raised.
+
+    If fnCost is given, items are started in order of descending cost (fnCost(item)), so that
+    the slow ones don't end up running alone at the end.
+
+    Returns a list of the fnWork results, in the order of the given items.
+    """
+    import concurrent.futures;
+
+    def workBuffered(oItem):
+        aBuffer = g_oOutputTls.aBuffer = [];
+        try:
+            return fnWork(oItem), None, aBuffer;
+        except BaseException as ex: # pylint: disable=broad-except
+            return None, ex, aBuffer;
+        finally:
+            g_oOutputTls.aBuffer = None;
+
+    aResults = [];
+    if not aoItems:
+        return aResults;
+    with concurrent.futures.ThreadPoolExecutor(max_workers = os.cpu_count() or 1) as oExecutor:
+        # sorted() is stable, so items of the same cost keep their order.
+        aoStart = sorted(aoItems, key = lambda oItem: -fnCost(oItem)) if fnCost else aoItems;
+        dictFutures = { id(oItem): oExecutor.submit(workBuffered, oItem) for oItem in aoStart };
+        for oItem in aoItems:
+            oResult, oXcpt, aBuffer = dictFutures[id(oItem)].result();
+            flushOutput(aBuffer);
+            if oXcpt is not None:
+                raise oXcpt;
+            aResults.append(oResult);
+    return aResults;
+
+def runChecksParallel(aoChecks):
+    """
+    Performs the given (independent) checks concurrently, expensive ones (nCostHint) first.
+    Unlike the serial loop, a failing check does not stop the remaining ones from being performed.
+
+    Returns a list of the check results, in the order of the given checks.
+    """
+    return runParallel(lambda oCheck: oCheck.performCheck(), aoChecks, lambda oCheck: oCheck.nCostHint);
+
 def print_targets(aeTargets):
     """
     Returns the given build targets list as a string.
@@ -3240,13 +4142,13 @@ g_aoLibs = [
                  sCode = '#include <linux/version.h>\nint printf(const char *f,...);\nint main(void) { printf("%d.%d.%d", LINUX_VERSION_CODE / 65536, (LINUX_VERSION_CODE % 65536) / 256,LINUX_VERSION_CODE % 256);\n#if LINUX_VERSION_CODE > KERNEL_VERSION(2,6,32)\nreturn 0;\n#else\nprintf("Expected version 2.6.32 or higher"); return 1;\n#endif\n }\n'),
     # Must come first, as some libraries below depend on libstdc++.
     # Also is required for the Linux Guest Additions.
-    LibraryCheck("libstdc++", [ "iostream" ], [ ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ],
+    LibraryCheck("libstdc++", [ "iostream" ], [ ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ], fCPP = True,
                  sCode = 'int main() { \nstd::string s = \"test";\n#ifdef __GLIBCXX__\nstd::cout << __GLIBCXX__;\n#elif defined(__GLIBCPP__)\nstd::cout << __GLIBCPP__;\n#else\nreturn 1\n#endif\nreturn 0; }\n'),
     ## @todo Undefined symbols for architecture arm64: _f32_add
     LibraryCheck("softfloat", [ "softfloat.h", "iprt/cdefs.h" ], [ "libsoftfloat" ], aeTargets = [ BuildTarget.ANY ], aeArchs = [ BuildArch.AMD64, BuildArch.X86 ], fUseInTree = True,
                  sCode = '#define IN_RING3\n#include <softfloat.h>\nint main() { softfloat_state_t s; float32_t x, y; f32_add(x, y, &s); printf("<found>"); return 0; }\n',
                  asIncPaths = [ os.path.join(g_sScriptPath, 'include') ]),
-    LibraryCheck("dxmt", [ "version.h" ], [ "libdxmt" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ], fUseInTree = True,
+    LibraryCheck("dxmt", [ "version.h" ], [ "libdxmt" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ], fUseInTree = True, fLinkRequired = False,
                  sCode = '#include <version.h>\nint main() { return 0; }\n',
                  dictDefinesToSetIfFailed = { 'VBOX_WITH_DXMT' : '' }),
     LibraryCheck("dxvk", [ "version.h" ], [ "libdxvk" ],  aeTargets = [ BuildTarget.LINUX ], fUseInTree = True,
@@ -3265,7 +4167,7 @@ g_aoLibs = [
                  sCode = '#include <libdevmapper.h>\nint main() { char v[64]; dm_get_library_version(v, sizeof(v)); printf("%s", v); return 0; }\n'),
     # Dragging in libgsoapssl++ when linking requires certain stubs to be implemented (soap_faultcode, soap_fault_subcode, ++) by the user (depending on the libgsoap version),
     # so we only do the bare minimum here (hence the empty lib definition) to return the installed version of libgsoap[ssl][++].
-    LibraryCheck("libgsoapssl++", [ "stdsoap2.h" ], [ ], aeTargets = [ BuildTarget.LINUX ],
+    LibraryCheck("libgsoapssl++", [ "stdsoap2.h" ], [ ], aeTargets = [ BuildTarget.LINUX ], fCPP = True,
                  sCode = '#include <stdsoap2.h>\nint main() { printf("%ld", GSOAP_VERSION); return 0; }\n',
                  dictDefinesToSetIfFailed = { 'VBOX_WITH_WEBSERVICES' : '' }),
     LibraryCheck("libjpeg-turbo", [ "turbojpeg.h" ], [ "libturbojpeg" ], aeTargets = [ BuildTarget.ANY ], fUseInTree = True,
@@ -3279,17 +4181,17 @@ g_aoLibs = [
                  sSdkName = "VBoxLibOgg"),
     LibraryCheck("libpam", [ "security/pam_appl.h" ], [ "libpam" ], aeTargets = [ BuildTarget.LINUX ],
                  sCode = '#include <security/pam_appl.h>\nint main() { \n#ifdef __LINUX_PAM__\nprintf("%d.%d", __LINUX_PAM__, __LINUX_PAM_MINOR__); if (__LINUX_PAM__ >= 1) return 0;\n#endif\nreturn 1; }\n'),
-    LibraryCheck("libpng", [ "png.h" ], [ "libpng" ], aeTargets = [ BuildTarget.ANY ], fUseInTree = True,
+    LibraryCheck("libpng", [ "png.h" ], [ "libpng" ], aeTargets = [ BuildTarget.ANY ], fUseInTree = True, fLinkRequired = False,
                  sCode = '#include <png.h>\nint main() { printf("%s", PNG_LIBPNG_VER_STRING); return 0; }\n'),
     LibraryCheck("libpthread", [ "pthread.h" ], [ "libpthread" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ],
                  sCode = '#include <unistd.h>\n#include <pthread.h>\nint main() { pthread_mutex_t mutex; if (pthread_mutex_init(&mutex, NULL))\n{ printf("pthread_mutex_init() failed"); return 1; }\nif (pthread_mutex_lock(&mutex))\n{ printf("pthread_mutex_lock() failed"); return 1; }\nif (pthread_mutex_unlock(&mutex))\n{ printf("pthread_mutex_unlock() failed"); return 1; }\n#ifdef _POSIX_VERSION\nprintf("%d", (long)_POSIX_VERSION); return 0;\n#endif\nreturn 1;\n }'),
     LibraryCheck("libpulse", [ "pulse/pulseaudio.h", "pulse/version.h" ], [ "libpulse" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ],
                  sCode = '#include <pulse/version.h>\nint main() { printf("%s", pa_get_library_version()); return 0; }\n'),
-    LibraryCheck("libslirp", [ "slirp/libslirp.h", "slirp/libslirp-version.h" ], [ "libslirp" ], aeTargets = [ BuildTarget.ANY ], fUseInTree = True,
+    LibraryCheck("libslirp", [ "slirp/libslirp.h", "slirp/libslirp-version.h" ], [ "libslirp" ], aeTargets = [ BuildTarget.ANY ], fUseInTree = True, fLinkRequired = False,
                  sCode = '#include <slirp/libslirp.h>\n#include <slirp/libslirp-version.h>\nint main() { printf("%d.%d.%d", SLIRP_MAJOR_VERSION, SLIRP_MINOR_VERSION, SLIRP_MICRO_VERSION); return 0; }\n'),
-    LibraryCheck("libssh", [ "libssh/libssh.h" ], [ "libssh" ], aeTargets = [ BuildTarget.DARWIN, BuildTarget.LINUX, BuildTarget.WINDOWS ], fUseInTree = True,
+    LibraryCheck("libssh", [ "libssh/libssh.h" ], [ "libssh" ], aeTargets = [ BuildTarget.DARWIN, BuildTarget.LINUX, BuildTarget.WINDOWS ], fUseInTree = True, fLinkRequired = False,
                  sCode = '#include <libssh/libssh.h>\n#include <libssh/libssh_version.h>\nint main() { printf("%d.%d.%d", LIBSSH_VERSION_MAJOR, LIBSSH_VERSION_MINOR, LIBSSH_VERSION_MICRO); return 0; }\n'),
-    LibraryCheck("libtpms", [ "libtpms/tpm_library.h" ], [ "libtpms" ], aeTargets = [ BuildTarget.ANY ], fUseInTree = True,
+    LibraryCheck("libtpms", [ "libtpms/tpm_library.h" ], [ "libtpms" ], aeTargets = [ BuildTarget.ANY ], fUseInTree = True, fLinkRequired = False,
                  sCode = '#include <libtpms/tpm_library.h>\nint main() { printf("%d.%d.%d", TPM_LIBRARY_VER_MAJOR, TPM_LIBRARY_VER_MINOR, TPM_LIBRARY_VER_MICRO); return 0; }\n'),
     LibraryCheck("libvncserver", [ "rfb/rfb.h", "rfb/rfbclient.h" ], [ "libvncserver" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ],
                  sCode = '#include <rfb/rfb.h>\nint main() { printf("%s", LIBVNCSERVER_PACKAGE_VERSION); return 0; }\n',
@@ -3304,38 +4206,38 @@ g_aoLibs = [
                  sCode = '#include <libxml/xmlversion.h>\nint main() { printf("%s", LIBXML_DOTTED_VERSION); return 0; }\n',
                  sSdkName = "VBoxLibXml2"),
     LibraryCheck("libxslt", [], [], [ BuildTarget.ANY ], None, fnCallback = LibraryCheck.checkCallback_libxslt),
-    LibraryCheck("zlib", [ "zlib.h" ], [ "libz" ], aeTargets = [ BuildTarget.ANY ], fUseInTree = True,
+    LibraryCheck("zlib", [ "zlib.h" ], [ "libz" ], aeTargets = [ BuildTarget.ANY ], fUseInTree = True, fLinkRequired = False,
                  sCode = '#include <zlib.h>\nint main() { printf("%s", ZLIB_VERSION); return 0; }\n'),
     ## @todo Compiling in-tree lib fails because of dragging in too much stuff like IN_RING3 and other includes.
     #LibraryCheck("lwip", [ "lwip/init.h" ], [ "liblwip" ], [ BuildTarget.ANY ],
     #             '#include <lwip/init.h>\nint main() { printf("%d.%d.%d", LWIP_VERSION_MAJOR, LWIP_VERSION_MINOR, LWIP_VERSION_REVISION); return 0; }\n'),
     LibraryCheck("libgl", [ "GL/gl.h" ], [ "libGL" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.DARWIN, BuildTarget.SOLARIS ],
-                 sCode = '#include <GL/gl.h>\n#include <stdio.h>\nint main() { const GLubyte *s = glGetString(GL_VERSION); printf("%s", s ? (const char *)s : "<found>"); return 0; }\n'),
+                 sCode = '#include <GL/gl.h>\n#include <stdio.h>\nint main() { const GLubyte *s = glGetString(GL_VERSION); printf("%s", s ? (const char *)s : "<found>"); return 0; }\n', nCostHint = 5),
     LibraryCheck("openssl", [ "openssl/crypto.h" ], [ "libcrypto", "libssl", "libz", "libzstd" ], fUseInTree = True,
                  sCode = '#include <openssl/crypto.h>\n#include <stdio.h>\nint main() { printf("%s", OpenSSL_version(OPENSSL_VERSION)); return 0; }\n',
                  sSdkName = "VBoxOpenSslStatic"),
     # Note: The required libs for Qt can differ (VBox infix and whatnot), and thus will
     #       be resolved in the check callback.
-    LibraryCheck("qt", [ "QtCore/QtGlobal" ], [ ], aeTargets = [ BuildTarget.ANY ],
+    LibraryCheck("qt", [ "QtCore/QtGlobal" ], [ ], aeTargets = [ BuildTarget.ANY ], fCPP = True,
                  sCode = '#define IN_RING3\n#include <QtCore/QtGlobal>\nint main() { std::cout << QT_VERSION_STR << std::endl;\n#if QT_VERSION >= 6 * 65536 + 8 * 256\nreturn 0;\n#else\nreturn 1;\n#endif\n}',
                  fnCallback = LibraryCheck.checkCallback_qt6,
                  sSdkName = 'QT6', dictDefinesToSetIfFailed = { 'VBOX_WITH_QTGUI' : '' }),
     LibraryCheck("libsdl2", [ "SDL2/SDL.h" ], [ "libSDL2" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ],
-                 sCode = '#include <SDL2/SDL.h>\nint main() { printf("%d.%d.%d", SDL_MAJOR_VERSION, SDL_MINOR_VERSION, SDL_PATCHLEVEL); return 0; }\n',
+                 sCode = '#include <SDL2/SDL.h>\nint main() { printf("%d.%d.%d", SDL_MAJOR_VERSION, SDL_MINOR_VERSION, SDL_PATCHLEVEL); return 0; }\n', fLinkRequired = False,
                  dictDefinesToSetIfFailed = { 'VBOX_WITH_VBOXSDL' : '' }),
     LibraryCheck("libsdl2_ttf", [ "SDL2/SDL_ttf.h" ], [ "libSDL2_ttf" ],
-                 sCode = '#include <SDL2/SDL_ttf.h>\nint main() { printf("%d.%d.%d", SDL_TTF_MAJOR_VERSION, SDL_TTF_MINOR_VERSION, SDL_TTF_PATCHLEVEL); return 0; }\n',
+                 sCode = '#include <SDL2/SDL_ttf.h>\nint main() { printf("%d.%d.%d", SDL_TTF_MAJOR_VERSION, SDL_TTF_MINOR_VERSION, SDL_TTF_PATCHLEVEL); return 0; }\n', fLinkRequired = False,
                  dictDefinesToSetIfFailed = { 'VBOX_WITH_SECURE_LABEL' : '' }),
     LibraryCheck("libx11", [ "X11/Xlib.h" ], [ "libX11" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ],
-                 sCode = '#include <X11/Xlib.h>\nint main() { Display *d = XOpenDisplay(NULL); XCloseDisplay(d); printf("<found>"); return 0; }\n'),
+                 sCode = '#include <X11/Xlib.h>\nint main() { Display *d = XOpenDisplay(NULL); XCloseDisplay(d); printf("<found>"); return 0; }\n', nCostHint = 5),
     LibraryCheck("libxext", [ "X11/extensions/Xext.h" ], [ "libXext" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ],
                  sCode = '#include <X11/Xlib.h>\n#include <X11/extensions/Xext.h>\nint main() { XSetExtensionErrorHandler(NULL); printf("<found>"); return 0; }\n'),
     LibraryCheck("libxmu", [ "X11/Xmu/Xmu.h" ], [ "libXmu" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ],
                  sCode = '#include <X11/Xmu/Xmu.h>\nint main() { XmuMakeAtom("test"); printf("<found>"); return 0; }\n', aeTargetsExcluded=[ BuildTarget.DARWIN ]),
     LibraryCheck("libxrandr", [ "X11/extensions/Xrandr.h" ], [ "libXrandr", "libX11" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ],
-                 sCode = '#include <X11/Xlib.h>\n#include <X11/extensions/Xrandr.h>\nint main() { Display *dpy = XOpenDisplay(NULL); Window root = RootWindow(dpy, 0); XRRScreenConfiguration *c = XRRGetScreenInfo(dpy, root); printf("<found>"); return 0; }\n'),
+                 sCode = '#include <X11/Xlib.h>\n#include <X11/extensions/Xrandr.h>\nint main() { Display *dpy = XOpenDisplay(NULL); Window root = RootWindow(dpy, 0); XRRScreenConfiguration *c = XRRGetScreenInfo(dpy, root); printf("<found>"); return 0; }\n', nCostHint = 5),
     LibraryCheck("libxinerama", [ "X11/extensions/Xinerama.h" ], [ "libXinerama", "libX11" ], aeTargets = [ BuildTarget.LINUX, BuildTarget.SOLARIS ],
-                 sCode = '#include <X11/Xlib.h>\n#include <X11/extensions/Xinerama.h>\nint main() { Display *dpy = XOpenDisplay(NULL); XineramaIsActive(dpy); printf("<found>"); return 0; }\n')
+                 sCode = '#include <X11/Xlib.h>\n#include <X11/extensions/Xinerama.h>\nint main() { Display *dpy = XOpenDisplay(NULL); XineramaIsActive(dpy); printf("<found>"); return 0; }\n', nCostHint = 5)
 ];
 
 # Note: The order is important here for subsequent checks.
@@ -3375,39 +4277,62 @@ g_aoTools = [
     ToolCheck("win-wix", asCmd = [ ], fnCallback = ToolCheck.checkCallback_WinWIX, aeTargets = [ BuildTarget.WINDOWS ])
 ];
 
+# The libraries and tools handled by the build target / architecture they were set up for.
+# These don't change at runtime, so they are determined once.
+g_aoLibsInTarget  = tuple(oLib for oLib in g_aoLibs if oLib.isInTarget());
+g_aoToolsInTarget = tuple(oTool for oTool in g_aoTools if oTool.isInTarget());
+
+def getLibToolArgs(aoLibs, aoTools):
+    """
+    Returns the command line arguments for the given libraries and tools,
+    as a tuple of (flags, add_argument keyword arguments) tuples.
+    """
+    atArgs = [];
+    for oLibCur in aoLibs:
+        atArgs.extend([
+            ((f'--build-{oLibCur.sName}', ),
+             dict(help=f'Explicitly build {oLibCur.sName} from in-tree sources', action='store_true', default=None, dest=f'config_libs_build_{oLibCur.sName}')),
+            ((f'--disable-{oLibCur.sName}', f'--without-{oLibCur.sName}'),
+             dict(help=f'Disables using {oLibCur.sName}', action='store_true', default=None, dest=f'config_libs_disable_{oLibCur.sName}')),
+            ((f'--with-{oLibCur.sName}-path', ),
+             dict(help=f'Sets the (root) path for {oLibCur.sName}', dest=f'config_libs_path_{oLibCur.sName}')),
+            # For debugging / development only. We don't expose this in the syntax help.
+            ((f'--only-{oLibCur.sName}', ),
+             dict(help=argparse.SUPPRESS, action='store_true', default=None, dest=f'config_libs_only_{oLibCur.sName}')),
+        ]);
+    for oToolCur in aoTools:
+        sToolName = oToolCur.sName.replace("-", "_"); # So that we can use variables directly w/o getattr.
+        atArgs.extend([
+            ((f'--disable-{oToolCur.sName}', f'--without-{oToolCur.sName}'),
+             dict(help=f'Disables using {oToolCur.sName}', action='store_true', default=None, dest=f'config_tools_disable_{sToolName}')),
+            ((f'--with-{oToolCur.sName}-path', ),
+             dict(help=f'Sets the (root) path for {oToolCur.sName}', dest=f'config_tools_path_{sToolName}')),
+            # For debugging / development only. We don't expose this in the syntax help.
+            ((f'--only-{oToolCur.sName}', ),
+             dict(help=argparse.SUPPRESS, action='store_true', default=None, dest=f'config_tools_only_{sToolName}')),
+        ]);
+    return tuple(atArgs);
+
+# The per library / tool command line arguments, built once.
+g_atLibToolArgs = getLibToolArgs(g_aoLibs, g_aoTools);
+
 def write_autoconfig_kmk(sFilePath, enmBuildTarget, oEnv, aoLibs, aoTools):
     """
     Writes the AutoConfig.kmk file with SDK paths and enable/disable flags.
     Each library/tool gets VBOX_WITH_<NAME>.
     """
-
     _ = enmBuildTarget, aoTools; # Unused for now.
 
     w = MakefileWriter(sFilePath, enmBuildTarget, oEnv, 36);
-    w.write_raw(f"""
-# -*- Makefile -*-
-#
-# Automatically generated by
-#
-#   {g_sScriptName} """ + ' '.join(sys.argv[1:]) + f"""
-#
-# DO NOT EDIT THIS FILE MANUALLY
-# It will be completely overwritten if {g_sScriptName} is executed again.
-#
-# Generated on """ + datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """
-#
-\n""");
+    w.write_raw('\n# -*- Makefile -*-\n#\n' + getGeneratedFileBanner('#') + '\n\n');
     # General stuff
     w.write_all(asPrefixInclude = ['VBOX_' ], asPrefixExclude= ['VBOX_WITH_']);
     w.write_raw('\n');
 
     # Features
     w.write_raw('# Features related to library presence');
-    for oLibCur in aoLibs:
-        if      oLibCur.isInTarget() \
-        and not oLibCur.fHave:
-            sVarBase = oLibCur.sName.upper().replace("+", "PLUS").replace("-", "_");
-            w.write_raw(f"VBOX_WITH_{sVarBase.ljust(26)} :=");
+    w.write_raw([ f"VBOX_WITH_{oLibCur.sVarBase.ljust(26)} :=" for oLibCur in aoLibs \
+                  if oLibCur.isInTarget() and not oLibCur.fHave ]);
     w.write_raw('\n');
 
     w.write_raw('# Features derived from arguments');
@@ -3428,15 +4353,12 @@ def write_autoconfig_kmk(sFilePath, enmBuildTarget, oEnv, aoLibs, aoTools):
     w.write_raw('\n');
 
     # Serialize all changes to disk.
-    w.save();
+    sContents = w.save();
 
     if g_fDebug or True: ## @todo remove 'or True'.
-        abBuf = None;
         print(f'Contents of {sFilePath}:');
-        with open(sFilePath, 'r', encoding = 'utf-8') as fh:
-            abBuf = fh.read();
-        if abBuf:
-            print(abBuf);
+        if sContents: # No need to read back what we just wrote.
+            print(sContents);
 
     return True;
 
@@ -3444,41 +4366,13 @@ def write_env(sFilePath, enmBuildTarget, enmBuildArch, oEnv, aoLibs, aoTools):
     """
     Writes the env.sh file with kBuild configuration and other tools stuff.
     """
-
     _ = aoLibs, aoTools; # Unused for now.
 
-    sTimestamp  = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S");
-    sScriptArgs = ' '.join(sys.argv[1:]);
-
     w = EnvFileWriter(sFilePath, enmBuildTarget, oEnv, 32);
     if enmBuildTarget != BuildTarget.WINDOWS:
-        w.write_raw(f"""
-#!/bin/bash
-# -*- Environment -*-
-#
-# Automatically generated by
-#
-#   {g_sScriptName} """ + sScriptArgs + f"""
-#
-# DO NOT EDIT THIS FILE MANUALLY
-# It will be completely overwritten if {g_sScriptName} is executed again.
-#
-# Generated on """ + sTimestamp + """
-#\n""");
+        w.write_raw('\n#!/bin/bash\n# -*- Environment -*-\n#\n' + getGeneratedFileBanner('#') + '\n');
     else: # non-Windows.
-        w.write_raw(f"""
-@echo off
-rem -*- Environment -*-
-rem
-rem Automatically generated by
-rem
-rem   {g_sScriptName} """ + sScriptArgs + f"""
-rem
-rem DO NOT EDIT THIS FILE MANUALLY
-rem It will be completely overwritten if {g_sScriptName} is executed again.
-rem
-rem Generated on """ +  sTimestamp + """
-rem\n""");
+        w.write_raw('\n@echo off\nrem -*- Environment -*-\nrem\n' + getGeneratedFileBanner('rem') + '\n');
 
     # AUTOCFG defines the path to AutoConfig.kmk and can be specified via '--output-file-autoconfig'.
     w.write('AUTOCFG');
@@ -3538,6 +4432,86 @@ def testMain():
             for sVer, sExpected in aTestcase:
                 self.assertEqual(checkBase.getVersionFromString(sVer, fAsString = True), sExpected);
     #
+    # Test evaluating macro expansions.
+    #
+    class tstGetMacroValue(unittest.TestCase):
+        """ Class for testing macro expansion evaluation. """
+        def testMacroValues(self):
+            """ Tests macro expansion evaluation. """
+            aTestcase = [
+                ('"1.2" ".3"', "1.2.3"),
+                ('42', 42),
+                ('0x10UL', 16),
+                ('((2) * 10000 + 9)', 20009),
+                ('-7 / 2', -3),
+                ('-7 % 2', -1),
+                ('(1 << 8) | 2', 258),
+                ('(long)5', None),
+                ('1.5', None),
+                ('FOO_VERSION', None),
+            ]
+            for sExpansion, oExpected in aTestcase:
+                self.assertEqual(getMacroValue(sExpansion), oExpected);
+    #
+    # Test classifying test programs.
+    #
+    class tstGetTestProbeType(unittest.TestCase):
+        """ Class for testing test program classification. """
+        def testProbeTypes(self):
+            """ Tests classifying the test programs of the library checks. """
+            aTestcase = [
+                ("curl", TestProbe.MACRO_ONLY),
+                ("dxvk", TestProbe.MACRO_ONLY),
+                ("libgsoapssl++", TestProbe.MACRO_ONLY),
+                ("libpng", TestProbe.MACRO_ONLY),
+                ("libxml2", TestProbe.MACRO_ONLY),
+                ("zlib", TestProbe.MACRO_ONLY),
+                ("dxmt", TestProbe.SYNTAX_ONLY),
+                ("linux-kernel-headers", TestProbe.RUN),
+                ("libasound", TestProbe.RUN),
+                ("libjpeg-turbo", TestProbe.RUN),
+                ("libpam", TestProbe.RUN),
+                ("libpthread", TestProbe.RUN),
+                ("libx11", TestProbe.RUN),
+                ("openssl", TestProbe.RUN),
+            ]
+            dictLibs = { oLib.sName: oLib for oLib in g_aoLibs };
+            for sName, enmExpected in aTestcase:
+                oLib = dictLibs[sName];
+                self.assertEqual(getTestProbeType(oLib.getTestCode(), BuildTarget.LINUX, oLib.fLinkRequired), enmExpected, sName);
+                # Only the GCC-style compiler invocation can skip linking.
+                self.assertEqual(getTestProbeType(oLib.getTestCode(), BuildTarget.WINDOWS, oLib.fLinkRequired), TestProbe.RUN, sName);
+    #
+    # Test applying environment rules.
+    #
+    class tstEnvApplyRules(unittest.TestCase):
+        """ Class for testing applying environment rules. """
+        def testApplyRules(self):
+            """ Tests applying environment rules. """
+            oEnv = EnvManager({ 'FOO': '1', 'BAR': '', 'BAZ': 'x' });
+            oEnv.applyRules([
+                ('FOO',                           { 'STR': 'set' }),
+                ('BAR',                           { 'EMPTY': 'set' }),
+                (('BAR', 'NOPE'),                 { 'TUPLE_NONE': 'set' }),
+                (('NOPE', 'BAZ'),                 { 'TUPLE_ANY': 'set' }),
+                (lambda oCur: oCur['BAZ'] == 'x', { 'CALLABLE': 'set' }),
+                (lambda oCur: False,              { 'CALLABLE_NOT': 'set' }),
+                ('FOO',                           { 'DERIVED': lambda oCur: oCur['BAZ'] + 'y' }),
+                ('FOO',                           { 'BAZ': 'first' }),
+                ('BAZ',                           { 'BAZ': 'last', 'NEW': 'set' }),
+                ('NEW',                           { 'ORDER': 'set' }), # Conditions see the environment before the rules.
+            ]);
+            self.assertEqual(oEnv['STR'], 'set');
+            self.assertIsNone(oEnv['EMPTY']);
+            self.assertIsNone(oEnv['TUPLE_NONE']);
+            self.assertEqual(oEnv['TUPLE_ANY'], 'set');
+            self.assertEqual(oEnv['CALLABLE'], 'set');
+            self.assertIsNone(oEnv['CALLABLE_NOT']);
+            self.assertEqual(oEnv['DERIVED'], 'xy');
+            self.assertEqual(oEnv['BAZ'], 'last');
+            self.assertEqual(oEnv['NEW'], 'set');
+            self.assertIsNone(oEnv['ORDER']);
+    #
     # Test finding files.
     #
     class tstFindFiles(unittest.TestCase):
@@ -3580,6 +4554,9 @@ def testMain():
 
     oTstSuite = unittest.TestSuite();
     oTstSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(tstGetVersionFromString));
+    oTstSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(tstGetMacroValue));
+    oTstSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(tstGetTestProbeType));
+    oTstSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(tstEnvApplyRules));
     oTstSuite.addTests(unittest.TestLoader().loadTestsFromTestCase(tstFindFiles));
     oTstSuiteRes = unittest.TextTestRunner(verbosity=2).run(oTstSuite);
     return 0 if oTstSuiteRes.wasSuccessful() else 1;
@@ -3596,6 +4573,7 @@ def main():
     global g_sFileLog;
     global g_enmBuildTarget;
     global g_enmBuildArch;
+    global g_oCompileCache;
 
     #
     # Special case:
@@ -3604,6 +4582,10 @@ def main():
     if len(sys.argv) >= 2:
         if sys.argv[1] == 'selftest':
             return testMain();
+        # No need to set up the (large) argument parser just for printing the version.
+        if sys.argv[1:] in ([ '-V' ], [ '--version' ]):
+            print(__revision__);
+            return 0;
     #
     # argparse config namespace rules:
     # - Everything internally used is prefixed with 'config_'.
@@ -3616,18 +4598,8 @@ def main():
     oParser.add_argument('-h', '--help', help="Displays this help", action='store_true');
     oParser.add_argument('-v', '--verbose', help="Enables verbose output", action='count', default=0, dest='config_verbose');
     oParser.add_argument('-V', '--version', help="Prints the version of this script", action='store_true');
-    for oLibCur in g_aoLibs:
-        oParser.add_argument(f'--build-{oLibCur.sName}', help=f'Explicitly build {oLibCur.sName} from in-tree sources', action='store_true', default=None, dest=f'config_libs_build_{oLibCur.sName}');
-        oParser.add_argument(f'--disable-{oLibCur.sName}', f'--without-{oLibCur.sName}', help=f'Disables using {oLibCur.sName}', action='store_true', default=None, dest=f'config_libs_disable_{oLibCur.sName}');
-        oParser.add_argument(f'--with-{oLibCur.sName}-path', help=f'Sets the (root) path for {oLibCur.sName}', dest=f'config_libs_path_{oLibCur.sName}');
-        # For debugging / development only. We don't expose this in the syntax help.
-        oParser.add_argument(f'--only-{oLibCur.sName}', help=argparse.SUPPRESS, action='store_true', default=None, dest=f'config_libs_only_{oLibCur.sName}');
-    for oToolCur in g_aoTools:
-        sToolName = oToolCur.sName.replace("-", "_"); # So that we can use variables directly w/o getattr.
-        oParser.add_argument(f'--disable-{oToolCur.sName}', f'--without-{oToolCur.sName}', help=f'Disables using {oToolCur.sName}', action='store_true', default=None, dest=f'config_tools_disable_{sToolName}');
-        oParser.add_argument(f'--with-{oToolCur.sName}-path', help=f'Sets the (root) path for {oToolCur.sName}', dest=f'config_tools_path_{sToolName}');
-        # For debugging / development only. We don't expose this in the syntax help.
-        oParser.add_argument(f'--only-{oToolCur.sName}', help=argparse.SUPPRESS, action='store_true', default=None, dest=f'config_tools_only_{sToolName}');
+    for tupleFlags, dictOpts in g_atLibToolArgs:
+        oParser.add_argument(*tupleFlags, **dictOpts);
 
     oParser.add_argument('--disable-docs', '--without-docs', help='Disables building the documentation', action='store_true', default=None, dest='VBOX_WITH_DOCS=');
     oParser.add_argument('--disable-dtrace', '--without-dtrace', help='Disables building features requiring DTrace ', action='store_true', default=None, dest='config_disable_dtrace');
@@ -3655,6 +4627,8 @@ def main():
     oParser.add_argument('--compat', help='Runs in compatibility mode. Only use for development', action='store_true', default=False, dest='config_compat');
     oParser.add_argument('--debug', help='Runs in debug mode. Only use for development', action='store_true', default=False, dest='config_debug');
     oParser.add_argument('--nofatal', '--continue-on-error', help='Continues execution on fatal errors', action='store_true', dest='config_nofatal');
+    oParser.add_argument('--no-cache', help='Does not use (or update) the cached test program results', action='store_true', default=False, dest='config_no_cache');
+    oParser.add_argument('--clean-cache', help='Removes the cached test program results before performing the checks', action='store_true', default=False, dest='config_clean_cache');
     oParser.add_argument('--build-profile', help='Build with a profiling support', action='store_true', default=None, dest='KBUILD_TYPE=profile');
     oParser.add_argument('--build-target', help='Specifies the build target', default = g_enmBuildTarget, dest='config_build_target');
     oParser.add_argument('--build-arch', help='Specifies the build architecture', default = g_enmBuildArch, dest='config_build_arch');
@@ -3739,12 +4713,15 @@ def main():
     else:
         g_sFileLog = oArgs.config_file_log;
     try:
-        g_fhLog = open(g_sFileLog, "w", encoding="utf-8");
+        # The log gets a lot of small writes, so give it a bigger buffer than the default.
+        g_fhLog = open(g_sFileLog, "w", encoding="utf-8", buffering=65536);
     except OSError as ex:
         printError(f"Failed to open log file '{g_sFileLog}' for writing: {str(ex)}");
         return 3;
     sys.stdout = Log(sys.stdout, g_fhLog);
     sys.stderr = Log(sys.stderr, g_fhLog);
+    # Make sure the log gets written out completely, even if we bail out with an exception.
+    atexit.register(closeLog);
 
     printLogHeader();
 
@@ -3764,6 +4741,17 @@ def main():
         printWarn(f"Output directory '{oArgs.config_out_dir}' does not exist -- using script directory as output base");
         oArgs.config_out_dir = g_sScriptPath;
 
+    # Set up the compile cache (needs the final output directory).
+    if not oArgs.config_no_cache:
+        g_oCompileCache = CompileCache(os.path.join(oArgs.config_out_dir, 'configure.cache'));
+        if oArgs.config_clean_cache:
+            g_oCompileCache.clean();
+        else:
+            g_oCompileCache.load();
+        atexit.register(g_oCompileCache.save);
+    elif oArgs.config_clean_cache:
+        CompileCache(os.path.join(oArgs.config_out_dir, 'configure.cache')).clean();
+
     # Handle build directory.
     if  oArgs.config_build_dir \
     and not isDir(oArgs.config_build_dir):
@@ -3822,21 +4810,25 @@ def main():
     g_oEnv.updateFromArgs(oArgs);
 
     # Filter libs and tools based on --only-XXX flags.
-    # Replace '-' with '_' so that we can use variables directly w/o getattr lateron.
-    aoOnlyLibs = [lib for lib in g_aoLibs if getattr(oArgs, f'config_libs_only_{lib.sName.replace("-", "_")}', False)];
-    aoOnlyTools = [tool for tool in g_aoTools if getattr(oArgs, f'config_tools_only_{tool.sName.replace("-", "_")}', False)];
-    aoLibsToCheck = aoOnlyLibs if aoOnlyLibs else g_aoLibs;
-    aoToolsToCheck = aoOnlyTools if aoOnlyTools else g_aoTools;
+    # Names are compared with '-' replaced by '_', as the argument destinations of libs and tools differ in that regard.
+    setOnlyLibs  = { sKey[len('config_libs_only_'):].replace('-', '_') for sKey, fValue in vars(oArgs).items() \
+                     if fValue and sKey.startswith('config_libs_only_') };
+    setOnlyTools = { sKey[len('config_tools_only_'):].replace('-', '_') for sKey, fValue in vars(oArgs).items() \
+                     if fValue and sKey.startswith('config_tools_only_') };
+    aoOnlyLibs  = [lib for lib in g_aoLibs if lib.sName.replace('-', '_') in setOnlyLibs] if setOnlyLibs else [];
+    aoOnlyTools = [tool for tool in g_aoTools if tool.sName.replace('-', '_') in setOnlyTools] if setOnlyTools else [];
     # Filter libs and tools based on build target.
-    aoLibsToCheck  = [lib for lib in aoLibsToCheck if lib.isInTarget()];
-    aoToolsToCheck = [tool for tool in aoToolsToCheck if tool.isInTarget()];
+    aoLibsToCheck  = [lib for lib in aoOnlyLibs if lib.isInTarget()] if aoOnlyLibs else list(g_aoLibsInTarget);
+    aoToolsToCheck = [tool for tool in aoOnlyTools if tool.isInTarget()] if aoOnlyTools else list(g_aoToolsInTarget);
 
     #
     # Handle OSE building.
     #
+    # Note: Anchored at the script path, so that this also works when not invoked from the source tree root.
+    #       A single (cached) stat is enough for telling whether the file is there.
     fOSE = True if g_oEnv.get('config_ose') else None;
     if  not fOSE  \
-    and pathExists('src/VBox/ExtPacks/Puel/ExtPack.xml'):
+    and isFile(os.path.join(g_sScriptPath, 'src', 'VBox', 'ExtPacks', 'Puel', 'ExtPack.xml'), fCached = True):
         print('Found ExtPack, assuming to build PUEL version');
         fOSE = False;
     else:
@@ -3854,88 +4846,87 @@ def main():
     # This is needed to set/unset/change other environment variables on already set ones.
     # For instance, building OSE requires certain components to be disabled. Same when a certain library gets disabled.
     #
-    envTransforms = [
+    #
+    # Rules for deriving settings from the configuration.
+    # Each rule is a (condition, updates) tuple, see EnvManager.applyRules() for details.
+    #
+    aEnvRules = [
         #
         # Generic
         #
-        lambda env: { 'VBOX_ONLY_ADDITIONS': '1' } if g_oEnv['config_only_additions'] else {},
+        ('config_only_additions', { 'VBOX_ONLY_ADDITIONS': '1' }),
         # Disabling building the docs when only building Additions or explicitly disabled building the docs.
-        lambda env: { 'VBOX_WITH_DOCS_PACKING': '' } if g_oEnv['config_only_additions']
-                                                     or g_oEnv['VBOX_WITH_DOCS'] == '' else {},
-        lambda env: { 'VBOX_WITH_WEBSERVICES': '' } if g_oEnv['config_only_additions'] else {},
+        (lambda env: env['config_only_additions'] or env['VBOX_WITH_DOCS'] == '', { 'VBOX_WITH_DOCS_PACKING': '' }),
+        ('config_only_additions', { 'VBOX_WITH_WEBSERVICES': '' }),
         # Disable stuff which aren't available in OSE.
-        lambda env: { 'VBOX_WITH_VALIDATIONKIT': '' , 'VBOX_WITH_WIN32_ADDITIONS': '' } if g_oEnv['config_ose'] else {},
+        ('config_ose', { 'VBOX_WITH_VALIDATIONKIT': '' , 'VBOX_WITH_WIN32_ADDITIONS': '' }),
         # Disable building the Extension Pack VNC feature when only building Additions.
-        lambda env: { 'VBOX_WITH_EXTPACK_VNC': '' } if g_oEnv['config_only_additions']
-                                                    or g_oEnv['config_ose'] else {},
+        (('config_only_additions', 'config_ose'), { 'VBOX_WITH_EXTPACK_VNC': '' }),
         # Disable Extension Pack PUEL features when building OSE.
-        lambda env: { 'VBOX_WITH_EXTPACK_PUEL': '', \
-                      'VBOX_WITH_EXTPACK_PUEL_BUILD': '' } if g_oEnv['config_ose'] else {},
+        ('config_ose', { 'VBOX_WITH_EXTPACK_PUEL': '',
+                         'VBOX_WITH_EXTPACK_PUEL_BUILD': '' }),
         # Disable Extension Pack feature (plus PUEL stuff) when building only Guest Additions
         # or with Extension Pack feature disabled.
-        lambda env: { 'VBOX_WITH_EXTPACK_PUEL_BUILD': '' } if g_oEnv['config_only_additions']
-                                                           or g_oEnv['config_disable_extpack'] else {},
+        (('config_only_additions', 'config_disable_extpack'), { 'VBOX_WITH_EXTPACK_PUEL_BUILD': '' }),
         # Disable FE/Qt if qt6 is disabled.
-        lambda env: { 'VBOX_WITH_QTGUI': '' } if g_oEnv['config_libs_disable_qt6'] else {},
+        ('config_libs_disable_qt6', { 'VBOX_WITH_QTGUI': '' }),
         # Disable components if we want to build headless.
-        lambda env: { 'VBOX_WITH_HEADLESS': '1', \
-                      'VBOX_WITH_QTGUI': '', \
-                      'VBOX_WITH_SECURELABEL': '', \
-                      'VBOX_WITH_VMSVGA3D': '', \
-                      'VBOX_WITH_3D_ACCELERATION' : '', \
-                      'VBOX_GUI_USE_QGL' : '' } if g_oEnv['config_build_headless'] else {},
+        ('config_build_headless', { 'VBOX_WITH_HEADLESS': '1',
+                                    'VBOX_WITH_QTGUI': '',
+                                    'VBOX_WITH_SECURELABEL': '',
+                                    'VBOX_WITH_VMSVGA3D': '',
+                                    'VBOX_WITH_3D_ACCELERATION' : '',
+                                    'VBOX_GUI_USE_QGL' : '' }),
         # Disable features when OpenGL is disabled.
-        lambda env: { 'VBOX_WITH_VMSVGA3D': '', \
-                      'VBOX_WITH_3D_ACCELERATION' : '', \
-                      'VBOX_GUI_USE_QGL' : '' } if g_oEnv['config_disable_opengl'] else {},
+        ('config_disable_opengl', { 'VBOX_WITH_VMSVGA3D': '',
+                                    'VBOX_WITH_3D_ACCELERATION' : '',
+                                    'VBOX_GUI_USE_QGL' : '' }),
         # Disable recording if libvpx is disabled.
-        lambda env: { 'VBOX_WITH_LIBVPX': '', \
-                      'VBOX_WITH_RECORDING': '' } if g_oEnv['config_libs_disable_libvpx'] else {},
+        ('config_libs_disable_libvpx', { 'VBOX_WITH_LIBVPX': '',
+                                         'VBOX_WITH_RECORDING': '' }),
         # Disable audio recording if libvpx is disabled.
-        lambda env: { 'VBOX_WITH_LIBOGG': '', \
-                      'VBOX_WITH_LIBVORBIS': '', \
-                      'VBOX_WITH_AUDIO_RECORDING': '' } if  g_oEnv['config_libs_disable_libogg'] \
-                                                        and g_oEnv['config_libs_disable_libvorbis'] else {},
+        (lambda env: env['config_libs_disable_libogg'] and env['config_libs_disable_libvorbis'], { 'VBOX_WITH_LIBOGG': '',
+                                                                                                   'VBOX_WITH_LIBVORBIS': '',
+                                                                                                   'VBOX_WITH_AUDIO_RECORDING': '' }),
         # Disable building webservices if GSOAP is disabled.
-        lambda env: { 'VBOX_WITH_GSOAP': '', \
-                      'VBOX_WITH_WEBSERVICES': '' } if g_oEnv['config_tools_disable_gsoap'] \
-                                                    or g_oEnv['config_libs_disable_libgsoapssl++'] else {},
+        (('config_tools_disable_gsoap', 'config_libs_disable_libgsoapssl++'), { 'VBOX_WITH_GSOAP': '',
+                                                                                'VBOX_WITH_WEBSERVICES': '' }),
         # Disable building Java webservices if java is disabled.
-        lambda env: { 'VBOX_WITH_JWS' : '', \
-                      'VBOX_WITH_JMSCOM': '', \
-                      'VBOX_WITH_JXPCOM' : '' } if g_oEnv['config_tools_disable_java'] else {},
+        ('config_tools_disable_java', { 'VBOX_WITH_JWS' : '',
+                                        'VBOX_WITH_JMSCOM': '',
+                                        'VBOX_WITH_JXPCOM' : '' }),
         # Disable components which require COM.
-        lambda env: { 'VBOX_WITH_MAIN': '', \
-                      'VBOX_WITH_QTGUI': '', \
-                      'VBOX_WITH_VBOXSDL': '', \
-                      'VBOX_WITH_DEBUGGER_GUI': '' } if g_oEnv['config_disable_com'] else {},
+        ('config_disable_com', { 'VBOX_WITH_MAIN': '',
+                                 'VBOX_WITH_QTGUI': '',
+                                 'VBOX_WITH_VBOXSDL': '',
+                                 'VBOX_WITH_DEBUGGER_GUI': '' }),
         # Disable components which require Python. Most likely this will blow up the build, as Python is mandatory nowadays.
-        lambda env: { 'VBOX_WITH_PYTHON': '' } if g_oEnv['config_disable_python'] else {},
+        ('config_disable_python', { 'VBOX_WITH_PYTHON': '' }),
         # Python is mandatory nowadays.
-        lambda env: { 'VBOX_BLD_PYTHON': os.path.join(g_oEnv['config_python_path'], 'python' + getExeSuff() ) } if g_oEnv['config_python_path'] else {},
+        ('config_python_path', { 'VBOX_BLD_PYTHON': lambda env: os.path.join(env['config_python_path'], 'python' + getExeSuff()) }),
         # Disable DTrace stuff if specified.
-        lambda env: { 'VBOX_WITH_EXTPACK_VBOXDTRACE': '', \
-                      'VBOX_WITH_DTRACE': ''  } if g_oEnv['config_disable_dtrace'] else {},
+        ('config_disable_dtrace', { 'VBOX_WITH_EXTPACK_VBOXDTRACE': '',
+                                    'VBOX_WITH_DTRACE': '' }),
         # Disable other stuff depending on SDL if SDL is disabled (like libsdl2_ttf).
-        lambda env: { 'VBOX_WITH_SDL': '', \
-                      'VBOX_WITH_SECURE_LABEL': '' } if g_oEnv['config_libs_disable_libsdl2'] else {},
+        ('config_libs_disable_libsdl2', { 'VBOX_WITH_SDL': '',
+                                          'VBOX_WITH_SECURE_LABEL': '' }),
 
         #
         # Windows
         #
-        lambda env: { 'VBOX_PATH_WIN_DDK_ROOT': g_oEnv['config_win_ddk_path'] } if g_oEnv['config_win_ddk_path'] else {},
-        lambda env: { 'VBOX_PATH_WIN_SDK_ROOT': g_oEnv['config_win_sdk_path'] } if g_oEnv['config_win_sdk_path'] else {},
-        lambda env: { 'VBOX_PATH_WIN_SDK10_ROOT': g_oEnv['config_win_sdk10_path'] } if g_oEnv['config_win_sdk10_path'] else {},
+        ('config_win_ddk_path', { 'VBOX_PATH_WIN_DDK_ROOT': lambda env: env['config_win_ddk_path'] }),
+        ('config_win_sdk_path', { 'VBOX_PATH_WIN_SDK_ROOT': lambda env: env['config_win_sdk_path'] }),
+        ('config_win_sdk10_path', { 'VBOX_PATH_WIN_SDK10_ROOT': lambda env: env['config_win_sdk10_path'] }),
         # Note: Pre-defined environment variable by vcpkg. Do not change.
-        lambda env: { 'VCPKG_ROOT': g_oEnv['config_win_vcpkg_root'] } if g_oEnv['config_win_vcpkg_root'] else {},
+        ('config_win_vcpkg_root', { 'VCPKG_ROOT': lambda env: env['config_win_vcpkg_root'] }),
 
         #
         # macOS
         #
         # Sets the macOS SDK path.
-        lambda env: { 'VBOX_PATH_MACOSX_SDK_ROOT': g_oEnv['config_macos_sdk_path'] } if g_oEnv['config_macos_sdk_path'] else {},
+        ('config_macos_sdk_path', { 'VBOX_PATH_MACOSX_SDK_ROOT': lambda env: env['config_macos_sdk_path'] }),
     ];
-    g_oEnv.transform(envTransforms);
+    g_oEnv.applyRules(aEnvRules);
 
     if g_cVerbosity >= 2:
         printVerbose(2, 'Environment manager variables:');
@@ -3965,10 +4956,12 @@ def main():
     if aOsToolsToCheck is None:
         printWarn(f"Unsupported build target \'{ g_enmBuildTarget }\' for OS tool checks, probably leading to build errors");
     else:
-        oOsToolsTable = SimpleTable([ 'Tool', 'Status', 'Version', 'Path' ]);
-        for sBinary in aOsToolsToCheck:
+        def checkOsTool(sBinary):
             printVerbose(1, f'Checking for OS tool: {sBinary}');
-            sCmdPath, sVer = checkWhich(sBinary, sBinary);
+            return checkWhich(sBinary, sBinary);
+
+        oOsToolsTable = SimpleTable([ 'Tool', 'Status', 'Version', 'Path' ]);
+        for sBinary, (sCmdPath, sVer) in zip(aOsToolsToCheck, runParallel(checkOsTool, aOsToolsToCheck)):
             oOsToolsTable.addRow(( sBinary,
                                 'ok' if sCmdPath else 'failed',
                                 sVer if sVer else "-",
@@ -3981,7 +4974,7 @@ def main():
     #
     # Perform tool checks.
     #
-    if g_cErrors == 0 \
+    if g_oErrors.cMessages == 0 \
     or g_fContOnErr:
         print();
         for oToolCur in aoToolsToCheck:
@@ -3995,16 +4988,19 @@ def main():
     #
     # Perform library checks.
     #
-    if g_cErrors == 0 \
+    # Note: Tool checks above are done serially, as later tools depend on the results of earlier ones
+    #       (compilers, kBuild, dev tools path, ...). Library checks are independent of each other.
+    #
+    if g_oErrors.cMessages == 0 \
     or g_fContOnErr:
         print();
+        aoLibsArgsSet = [];
         for oLibCur in aoLibsToCheck:
             if not oLibCur.setArgs(oArgs):
                 break;
-            fRc = oLibCur.performCheck();
-            if      fRc is False \
-            and not g_fContOnErr:
-                break;
+            aoLibsArgsSet.append(oLibCur);
+        batchHeaderProbe(aoLibsArgsSet);
+        runChecksParallel(aoLibsArgsSet);
     #
     # Print summary.
     #
@@ -4044,7 +5040,7 @@ def main():
         try: os.remove(oArgs.config_file_env);
         except: pass;
 
-    if g_cErrors == 0 \
+    if g_oErrors.cMessages == 0 \
     or g_fContOnErr:
         if write_autoconfig_kmk(oArgs.config_file_autoconfig, g_enmBuildTarget, g_oEnv, g_aoLibs, g_aoTools):
             if write_env(oArgs.config_file_env, g_enmBuildTarget, g_enmBuildArch, g_oEnv, g_aoLibs, g_aoTools):
@@ -4096,33 +5092,33 @@ def main():
             print('  +++ WARNING +++ WARNING +++ WARNING +++ WARNING +++ WARNING +++ WARNING +++');
             print();
 
-    if g_cWarnings:
-        print(f'Configuration completed with {g_cWarnings} warning(s). See {g_sFileLog} for details.');
+    if g_oWarnings.cMessages:
+        print(f'Configuration completed with {g_oWarnings.cMessages} warning(s). See {g_sFileLog} for details.');
         print('');
-        for sWarn in g_asWarnings:
+        for sWarn in g_oWarnings.asMessages:
             print(f'    *** WARN: {sWarn}');
-    if g_cErrors:
+    if g_oErrors.cMessages:
         print('');
-        print(f'Configuration failed with {g_cErrors} error(s). See {g_sFileLog} for details.');
+        print(f'Configuration failed with {g_oErrors.cMessages} error(s). See {g_sFileLog} for details.');
         print('');
-        for sErr in g_asErrors:
+        for sErr in g_oErrors.asMessages:
             print(f'    *** ERROR: {sErr}');
     if  g_fContOnErr \
-    and g_cErrors:
+    and g_oErrors.cMessages:
         print('');
         print('Note: Errors occurred but non-fatal mode active -- check build carefully!');
 
-    if g_cErrors == 0:
+    if g_oErrors.cMessages == 0:
         print('');
         print('Enjoy!');
     else:
         print('');
-        print(f'Ended with {g_cErrors} error(s) and {g_cWarnings} warning(s)');
+        print(f'Ended with {g_oErrors.cMessages} error(s) and {g_oWarnings.cMessages} warning(s)');
 
     print('');
 
-    g_fhLog.close();
-    return 0 if g_cErrors == 0 else 1;
+    closeLog();
+    return 0 if g_oErrors.cMessages == 0 else 1;
 
 if __name__ == "__main__":
     sys.exit(main());